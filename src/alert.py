@@ -1,5 +1,5 @@
 """
-Enum for alert levels and data class of type
+Enums for alert levels and alert types (frameworks) and data class of type
 (AlertLevel, String) containing the alert message
 """
 from __future__ import annotations
@@ -18,6 +18,24 @@ class AlertLevel(Enum):
     SLACK = 2
 
 
+class AlertType(Enum):
+    """Supported Alert Frameworks."""
+
+    SLACK = "slack"
+    TWITTER = "twitter"
+
+    @classmethod
+    def from_str(cls, val: str) -> AlertType:
+        """From string constructor"""
+        return cls(val.lower())
+
+    @property
+    def max_length(self) -> int:
+        """Maximum message length of the framework"""
+        # Slack's recommended limit (hard limit is 40k) and Twitter's tweet length
+        return {AlertType.SLACK: 4000, AlertType.TWITTER: 280}[self]
+
+
 @dataclass
 class Alert:
     """Encodes a "tuple" of AlertLevel with a message"""
@@ -0,0 +1,238 @@
+"""
+Small embedded HTTP API of the daemon, e.g. for incident responders to re-run
+a monitor immediately, reusing the warm clients of the running process.
+
+    GET  /monitors              lists the loaded monitors
+    POST /monitors/<key>/run    runs a monitor, responding with its alert and timing
+                                (with `?async=1` responds with a job id right away)
+    GET  /jobs/<id>             status (and result) of an asynchronous run
+    GET  /metrics               circuit breakers of Dune endpoints and memory budget
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TYPE_CHECKING
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.resilience import CircuitOpenError, ResilientDuneClient
+from src.runner import RunReport
+
+if TYPE_CHECKING:
+    from src.daemon import MonitorDaemon
+
+log = logging.getLogger(__name__)
+
+# Number of finished asynchronous jobs kept for retrieval
+MAX_JOBS = 100
+
+
+def report_json(key: str, report: RunReport) -> dict[str, Any]:
+    """JSON representation of the outcome of a run of monitor `key`"""
+    return {
+        "monitor": key,
+        "alert": {"level": report.alert.level.name, "message": report.alert.message},
+        "row_count": len(report.results),
+        "seconds": round(report.seconds, 3),
+        "peak_rss": report.peak_rss,
+    }
+
+
+class MonitorAPI:
+    """Serves the monitors of `daemon` on `host`:`port` from a background thread"""
+
+    def __init__(
+        self, daemon: MonitorDaemon, host: str, port: int, max_workers: int = 4
+    ):
+        self.daemon = daemon
+        self.server = _Server((host, port), self)
+        # Accessed by concurrent request handlers, guarded by `_jobs_lock`
+        self.jobs: OrderedDict[str, Future[dict[str, Any]]] = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="api")
+
+    def _assigned(self) -> dict[str, str]:
+        """Worker assigned to each loaded monitor, by key (empty unless sharded)"""
+        if self.daemon.shard is None:
+            return {}
+        return {
+            self.daemon.monitor_key(path): worker
+            for path, worker in self.daemon.owners().items()
+        }
+
+    def monitors(self) -> dict[str, str]:
+        """Currently loaded monitors run by this worker: key -> config path"""
+        paths = {
+            self.daemon.monitor_key(path): path for path in list(self.daemon.runners)
+        }
+        if self.daemon.shard is None:
+            return paths
+        assigned = self._assigned()
+        return {
+            key: path
+            for key, path in paths.items()
+            if assigned.get(key) == self.daemon.shard.worker
+        }
+
+    def owner(self, key: str) -> str | None:
+        """Worker running monitor `key` (None if unknown or not sharded)"""
+        return self._assigned().get(key)
+
+    def describe(self) -> list[dict[str, Any]]:
+        """Summary of all monitors run by this worker"""
+        # Snapshot, as the daemon may concurrently reload (and remove) runners
+        runners = dict(self.daemon.runners)
+        return [
+            {
+                "key": key,
+                "name": runners[path].query.name,
+                "query_id": runners[path].query.query_id,
+                "url": runners[path].query.result_url(),
+            }
+            for key, path in sorted(self.monitors().items())
+            if path in runners
+        ]
+
+    def metrics(self) -> dict[str, Any]:
+        """Process wide state affecting all monitors"""
+        dune, budget = self.daemon.dune, self.daemon.options.budget
+        return {
+            "monitors": len(self.daemon.runners),
+            "circuit_breakers": (
+                dune.breakers.snapshot()
+                if isinstance(dune, ResilientDuneClient)
+                else {}
+            ),
+            "memory": {"limit": budget.limit, "used": budget.used, "peak": budget.peak},
+        }
+
+    def run(self, key: str) -> dict[str, Any]:
+        """Runs monitor `key` right now (in the calling thread)"""
+        log.info(f"running {key} on demand")
+        return report_json(key, self.daemon.run_monitor(self.monitors()[key], []))
+
+    def submit(self, key: str) -> str:
+        """Runs monitor `key` in the background, returning the id of the job"""
+        job_id = uuid.uuid4().hex
+        submitted = time.monotonic()
+
+        def job() -> dict[str, Any]:
+            result = self.run(key)
+            result["queued_seconds"] = round(time.monotonic() - submitted, 3)
+            return result
+
+        future = self._executor.submit(job)
+        with self._jobs_lock:
+            self.jobs[job_id] = future
+            while len(self.jobs) > MAX_JOBS:
+                self.jobs.popitem(last=False)
+        return job_id
+
+    def job(self, job_id: str) -> dict[str, Any] | None:
+        """Status of job `job_id` (including its result once done), None if unknown"""
+        with self._jobs_lock:
+            future = self.jobs.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {"job_id": job_id, "status": "running"}
+        if future.exception():
+            return {
+                "job_id": job_id,
+                "status": "failed",
+                "error": str(future.exception()),
+            }
+        return {"job_id": job_id, "status": "done", "result": future.result()}
+
+    def start(self) -> None:
+        """Starts serving requests from a daemon thread"""
+        host, port = self.server.server_address[:2]
+        log.info(f"serving monitor API on http://{host!s}:{port}")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops serving requests"""
+        self.server.shutdown()
+        self.server.server_close()
+        self._executor.shutdown(wait=False)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], api: MonitorAPI):
+        super().__init__(address, _Handler)
+        self.api = api
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+
+    def _respond(self, status: HTTPStatus, body: Any) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self) -> tuple[list[str], dict[str, list[str]]]:
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        return parts, parse_qs(url.query)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Lists monitors or returns the status of a job"""
+        api = self.server.api
+        parts, _ = self._route()
+        if parts == ["monitors"]:
+            self._respond(HTTPStatus.OK, api.describe())
+        elif parts == ["metrics"]:
+            self._respond(HTTPStatus.OK, api.metrics())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            # Looked up once, as jobs may be evicted concurrently
+            job = api.job(parts[1])
+            if job is None:
+                self._respond(
+                    HTTPStatus.NOT_FOUND, {"error": f"unknown job {parts[1]}"}
+                )
+            else:
+                self._respond(HTTPStatus.OK, job)
+        else:
+            self._respond(HTTPStatus.NOT_FOUND, {"error": f"not found: {self.path}"})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Runs a monitor (synchronously, or asynchronously with `?async=1`)"""
+        api = self.server.api
+        parts, query = self._route()
+        if not (len(parts) == 3 and parts[0] == "monitors" and parts[2] == "run"):
+            self._respond(HTTPStatus.NOT_FOUND, {"error": f"not found: {self.path}"})
+        elif parts[1] not in api.monitors():
+            owner = api.owner(parts[1])
+            if owner is None:
+                error = {"error": f"unknown monitor {parts[1]}"}
+                self._respond(HTTPStatus.NOT_FOUND, error)
+            else:
+                error = {"error": f"{parts[1]} is run by {owner}", "owner": owner}
+                self._respond(HTTPStatus.CONFLICT, error)
+        elif query.get("async", ["0"])[0] not in ("0", "false"):
+            job_id = api.submit(parts[1])
+            self._respond(HTTPStatus.ACCEPTED, {"job_id": job_id, "status": "running"})
+        else:
+            try:
+                self._respond(HTTPStatus.OK, api.run(parts[1]))
+            except CircuitOpenError as err:
+                self._respond(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(err)})
+            except Exception as err:  # pylint: disable=broad-except
+                log.exception(f"on demand run of {parts[1]} failed with {err}")
+                self._respond(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(err)})
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        log.debug("%s - %s", self.address_string(), format % args)
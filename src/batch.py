@@ -0,0 +1,105 @@
+"""
+One-shot batch mode: runs many query configurations concurrently
+in a bounded pool of worker threads sharing a single DuneClient,
+respecting dependencies between the monitors.
+Fan-in monitors share a single execution of their batched query.
+The batch ends when all monitors finished or a global deadline passed.
+"""
+from __future__ import annotations
+
+import glob
+import logging
+
+from dune_client.client import DuneClient
+from dune_client.types import QueryParameter
+
+from src.dag import DagExecutor, DependencyGraph, NodeResult
+from src.fan_in import FanInGroup, FanInRunner, build_groups
+from src.post.factory import PostClientCache
+from src.query_monitor.factory import Config, load_config
+from src.runner import QueryRunner, RunOptions, RunReport
+
+log = logging.getLogger(__name__)
+
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    """Expands glob patterns (plain paths are kept as is) without duplicates"""
+    paths: list[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            log.warning(f"pattern {pattern} did not match any file")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+class BatchRunner:
+    """Runs all `paths` with at most `max_workers` concurrent monitors"""
+
+    def __init__(
+        self,
+        paths: list[str],
+        dune: DuneClient,
+        max_workers: int = 8,
+        options: RunOptions | None = None,
+    ):
+        self.paths = paths
+        self.dune = dune
+        self.max_workers = max_workers
+        self.options = options or RunOptions()
+        self.configs: dict[str, Config] = {}
+        self.fan_in: dict[str, FanInGroup] = {}
+        self.post_clients = PostClientCache()
+
+    def run_one(self, path: str, overrides: list[QueryParameter]) -> RunReport:
+        """Runs the monitor configured at `path` (with upstream parameters)"""
+        config = self.configs[path]
+        config.query.override_parameters(overrides)
+        alerter = self.post_clients.get(config.alert_type, config.alert_channel)
+        if path in self.fan_in:
+            return FanInRunner(
+                config.query,
+                self.fan_in[path],
+                alerter,
+                self.options,
+                memory_limit=config.memory_limit,
+            ).run_loop()
+        return QueryRunner(
+            query=config.query,
+            dune=self.dune,
+            alerter=alerter,
+            ping_frequency=config.ping_frequency,
+            options=self.options,
+            memory_limit=config.memory_limit,
+        ).run_loop()
+
+    def run(self, deadline: float | None = None) -> dict[str, NodeResult]:
+        """
+        Runs the batch, returning one result per path (in order of `paths`).
+        Monitors run as soon as their dependencies finished. Those still
+        pending or running after `deadline` seconds are reported as timed out.
+        """
+        results: dict[str, NodeResult] = {}
+        for path in self.paths:
+            try:
+                self.configs[path] = load_config(path)
+            except Exception as err:  # pylint: disable=broad-except
+                log.error(f"failed to load config {path}: {err}")
+                results[path] = NodeResult("failed", error=str(err))
+        self.fan_in = build_groups(self.configs, self.dune, self.options.budget)
+        executor = DagExecutor(
+            DependencyGraph(self.configs), self.run_one, self.max_workers
+        )
+        results.update(executor.run(deadline))
+        return {path: results[path] for path in self.paths}
+
+
+def log_summary(results: dict[str, NodeResult]) -> None:
+    """Logs a one line summary per monitor and the overall counts"""
+    for path, result in results.items():
+        log.info(
+            f"{path}: {result.status} after {result.seconds:.1f}s"
+            + (f" ({result.error})" if result.error else "")
+        )
+    failed = [path for path, result in results.items() if not result.ok]
+    log.info(f"batch of {len(results)} monitors finished with {len(failed)} failures")
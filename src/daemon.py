@@ -0,0 +1,238 @@
+"""
+Long running mode: periodically runs every monitor configured in a directory.
+Configuration changes are picked up between ticks, and only the
+monitors whose files changed are replaced (no restart required).
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from functools import partial
+from typing import Any
+
+from dune_client.client import DuneClient
+from dune_client.types import QueryParameter
+
+from src.api import MonitorAPI
+from src.dag import DagExecutor, DependencyGraph
+from src.fan_in import FanInGroup, FanInRunner, build_groups
+from src.logger import configure_logging
+from src.memory import MemoryBudget
+from src.post.factory import PostClientCache
+from src.query_monitor.loader import ConfigLoader
+from src.resilience import ResilientDuneClient
+from src.history import HistoryStore
+from src.runner import QueryRunner, RunOptions, RunReport
+from src.sharding import LeaseStore, ShardCoordinator
+
+log = logging.getLogger(__name__)
+
+
+class MonitorDaemon:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps one QueryRunner per config file and runs all of them every `interval`
+    (in dependency order, skipping dependent monitors whose conditions aren't met),
+    at most `max_workers` independent monitors at a time.
+    With a `shard` coordinator, only the monitors assigned to this worker are run
+    (exactly once per tick across all workers).
+    """
+
+    def __init__(
+        self,
+        loader: ConfigLoader,
+        dune: DuneClient,
+        interval: int,
+        options: RunOptions | None = None,
+        shard: ShardCoordinator | None = None,
+        *,
+        max_workers: int = 8,
+    ):
+        self.loader = loader
+        self.dune = dune
+        self.interval = interval
+        self.options = options or RunOptions()
+        self.shard = shard
+        self.max_workers = max_workers
+        self.runners: dict[str, QueryRunner] = {}
+        # Post clients are shared by all monitors with the same destination.
+        self.post_clients = PostClientCache()
+
+    def monitor_key(self, path: str) -> str:
+        """Host independent identifier of the monitor configured at `path`"""
+        return os.path.relpath(path, self.loader.directory)
+
+    def owners(self) -> dict[str, str]:
+        """Worker assigned to each loaded monitor (i.e. its component), when sharded"""
+        assert self.shard is not None
+        components = DependencyGraph(self.loader.configs()).components()
+        keys = {path: self.monitor_key(root) for path, root in components.items()}
+        workers = self.shard.assignments(set(keys.values()))
+        return {path: workers[key] for path, key in keys.items()}
+
+    def reload(self) -> None:
+        """Hot swaps the runners of all added, modified or removed configs"""
+        changes = self.loader.poll()
+        for path, config in changes.updated.items():
+            self.runners[path] = QueryRunner(
+                query=config.query,
+                dune=self.dune,
+                alerter=self.post_clients.get(config.alert_type, config.alert_channel),
+                ping_frequency=config.ping_frequency,
+                options=self.options,
+                memory_limit=config.memory_limit,
+            )
+        for path in changes.removed:
+            self.runners.pop(path, None)
+
+    def run_monitor(
+        self,
+        path: str,
+        overrides: list[QueryParameter],
+        fan_in: dict[str, FanInGroup] | None = None,
+    ) -> RunReport:
+        """
+        Runs the monitor configured at `path` (with upstream parameters),
+        fetching results from its FanInGroup when part of one.
+        """
+        runner = self.runners[path]
+        # Scheduled and on demand (API) runs of a monitor never overlap.
+        with runner.lock:
+            runner.query.override_parameters(overrides)
+            if fan_in and path in fan_in:
+                return FanInRunner(
+                    runner.query,
+                    fan_in[path],
+                    runner.alerter,
+                    self.options,
+                    memory_limit=runner.memory_limit,
+                ).run_loop()
+            return runner.run_loop()
+
+    def tick(self, tick: int = 0) -> None:
+        """
+        Reloads changed configs and runs every (owned) monitor once for `tick`.
+        Monitors depending on each other are sharded (and leased) together.
+        """
+        self.reload()
+        graph = DependencyGraph(self.loader.configs())
+        groups: dict[str, set[str]] = {}
+        for path, root in graph.components().items():
+            groups.setdefault(self.monitor_key(root), set()).add(path)
+        if self.shard:
+            owned = self.shard.owned(groups)
+            groups = {
+                key: groups[key] for key in owned if self.shard.acquire(key, tick)
+            }
+        subgraph = graph.subgraph(set().union(*groups.values()))
+        # Fan-in groups (i.e. their shared executions) only live for one tick.
+        fan_in = build_groups(subgraph.configs, self.dune, self.options.budget)
+        try:
+            # Runs of the same monitor (or fan-in group) are serialized by their locks.
+            DagExecutor(
+                subgraph,
+                partial(self.run_monitor, fan_in=fan_in),
+                max_workers=self.max_workers,
+            ).run()
+        finally:
+            if self.shard:
+                for key in groups:
+                    self.shard.complete(key, tick)
+
+    def run(self) -> None:
+        """Runs a tick every `self.interval` seconds, forever"""
+        if self.shard is None:
+            while True:
+                start = time.monotonic()
+                self.tick()
+                time.sleep(max(0.0, self.interval - (time.monotonic() - start)))
+
+        # Sharded workers agree on wall clock aligned ticks and poll more often
+        # than `interval`, in order to pick up monitors of failed workers.
+        self.shard.start()
+        try:
+            while True:
+                tick = int(time.time() // self.interval)
+                self.tick(tick)
+                self.shard.store.prune(before_tick=tick - 1)
+                time.sleep(min(self.interval, self.shard.store.ttl / 3))
+        finally:
+            self.shard.stop()
+
+
+def run_daemon(
+    config_dir: str,
+    interval: int,
+    *,
+    result_dump: str | None = None,
+    lease_db: str | None = None,
+    history_dir: str | None = None,
+    api_port: int | None = None,
+    api_host: str = "127.0.0.1",
+    memory_budget: int | None = None,
+    monitor_memory_budget: int | None = None,
+    spill_dir: str | None = None,
+    max_workers: int = 8,
+) -> None:
+    """
+    Runs a MonitorDaemon (as one sharded worker if `lease_db` is given) running
+    at most `max_workers` monitors concurrently,
+    serving its MonitorAPI on `api_host`:`api_port` if a port is given.
+    Results beyond the memory budgets (in bytes) are spilled to `spill_dir`.
+    """
+    # No-op unless this is a freshly spawned worker process
+    configure_logging()
+    daemon = MonitorDaemon(
+        loader=ConfigLoader(config_dir),
+        dune=ResilientDuneClient(os.environ["DUNE_API_KEY"]),
+        interval=interval,
+        options=RunOptions(
+            result_dump=result_dump,
+            history=HistoryStore(history_dir) if history_dir else None,
+            budget=MemoryBudget(memory_budget, monitor_memory_budget, spill_dir),
+        ),
+        shard=ShardCoordinator(LeaseStore(lease_db)) if lease_db else None,
+        max_workers=max_workers,
+    )
+    if api_port is not None:
+        # Loads the monitors before serving them
+        daemon.reload()
+        MonitorAPI(daemon, api_host, api_port).start()
+    daemon.run()
+
+
+def run_workers(
+    workers: int,
+    config_dir: str,
+    interval: int,
+    *,
+    lease_db: str,
+    api_port: int | None = None,
+    **options: Any,
+) -> None:
+    """
+    Runs `workers` sharded daemon processes sharing the leases in `lease_db`,
+    passing all other `options` on to `run_daemon` (memory budgets and
+    `max_workers` apply per worker).
+    Worker `i` serves its MonitorAPI on `api_port + i`, if a port is given.
+    """
+    # Spawned (rather than forked) workers set up their own logging threads
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_daemon,
+            args=(config_dir, interval),
+            kwargs={
+                **options,
+                "lease_db": lease_db,
+                "api_port": None if api_port is None else api_port + i,
+            },
+            name=f"monitor-worker-{i}",
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
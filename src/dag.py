@@ -0,0 +1,212 @@
+"""
+Dependency graph of monitors (declared via `depends_on` in their configs)
+and an executor running the graph with maximum parallelism:
+every monitor starts as soon as all of its upstream monitors finished,
+and is skipped when an upstream run did not alert at the required level.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from dune_client.types import QueryParameter
+
+from src.query_monitor.factory import Config, Dependency
+from src.resilience import CircuitOpenError
+from src.runner import RunReport
+
+log = logging.getLogger(__name__)
+
+# Runs the monitor identified by key with the given parameter overrides
+RunFunction = Callable[[str, list[QueryParameter]], RunReport]
+
+
+@dataclass
+class NodeResult:
+    """Outcome of a monitor within a graph execution"""
+
+    # Alert level name of the run, or one of "failed", "skipped", "deferred"
+    # (Dune unavailable, i.e. a circuit breaker open) and "timed out"
+    status: str
+    seconds: float = 0.0
+    report: RunReport | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the monitor completed its run (or was legitimately skipped)"""
+        return self.status not in ("failed", "deferred", "timed out")
+
+
+class DependencyGraph:
+    """
+    Monitors keyed by an identifier (e.g. config path) with dependencies
+    resolved by monitor name. Invalid dependencies (unknown or ambiguous names,
+    cycles) do not raise, but are recorded in `errors` for the affected monitors.
+    """
+
+    def __init__(self, configs: dict[str, Config]):
+        self.configs = configs
+        self.upstream: dict[str, list[tuple[str, Dependency]]] = {}
+        self.downstream: dict[str, list[str]] = {key: [] for key in configs}
+        self.errors: dict[str, str] = {}
+
+        by_name: dict[str, list[str]] = {}
+        for key, config in configs.items():
+            by_name.setdefault(config.query.name, []).append(key)
+        for key, config in configs.items():
+            self.upstream[key] = []
+            for dependency in config.dependencies:
+                candidates = by_name.get(dependency.monitor, [])
+                if len(candidates) != 1:
+                    self.errors[key] = (
+                        f"dependency {dependency.monitor} matches "
+                        f"{len(candidates)} monitors"
+                    )
+                    continue
+                self.upstream[key].append((candidates[0], dependency))
+                self.downstream[candidates[0]].append(key)
+        for key in self._cyclic():
+            self.errors.setdefault(key, "dependency cycle")
+
+    def _cyclic(self) -> list[str]:
+        """Monitors on (or downstream of) a cycle, i.e. left over by Kahn's algorithm"""
+        indegree = {key: len(upstream) for key, upstream in self.upstream.items()}
+        ready = [key for key, degree in indegree.items() if degree == 0]
+        while ready:
+            for child in self.downstream[ready.pop()]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        return sorted(key for key, degree in indegree.items() if degree > 0)
+
+    def components(self) -> dict[str, str]:
+        """
+        Maps each monitor onto a representative (the smallest key) of its
+        connected component, i.e. the set of monitors that must run together.
+        """
+        parent = {key: key for key in self.configs}
+
+        def find(key: str) -> str:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for key, upstream in self.upstream.items():
+            for upstream_key, _ in upstream:
+                first, second = sorted([find(key), find(upstream_key)])
+                parent[second] = first
+        return {key: find(key) for key in self.configs}
+
+    def subgraph(self, keys: set[str]) -> DependencyGraph:
+        """Graph restricted to `keys` (which should be a union of components)"""
+        return DependencyGraph({key: self.configs[key] for key in keys})
+
+
+class DagExecutor:
+    """Runs a DependencyGraph in a pool of at most `max_workers` threads"""
+
+    def __init__(self, graph: DependencyGraph, run: RunFunction, max_workers: int):
+        self.graph = graph
+        self.run_monitor = run
+        self.max_workers = max_workers
+        self.results: dict[str, NodeResult] = {}
+        self._ready: list[tuple[str, list[QueryParameter]]] = []
+        self._pending_upstream: dict[str, int] = {}
+        self._condition = threading.Condition()
+
+    def _finish(self, key: str, result: NodeResult) -> None:
+        """Records `result` and schedules (or skips) dependents. Requires the lock"""
+        self.results[key] = result
+        self._release(key)
+
+    def _release(self, key: str) -> None:
+        for child in self.graph.downstream[key]:
+            self._pending_upstream[child] -= 1
+            if self._pending_upstream[child] == 0 and child not in self.results:
+                self._schedule(child)
+        self._condition.notify_all()
+
+    def _schedule(self, key: str) -> None:
+        """Queues `key` if its dependencies are satisfied. Requires the lock"""
+        overrides: list[QueryParameter] = []
+        for upstream_key, dependency in self.graph.upstream[key]:
+            upstream = self.results[upstream_key]
+            if upstream.report is None or not dependency.is_satisfied(
+                upstream.report.alert.level
+            ):
+                log.info(f"skipping {key}: {dependency.monitor} was {upstream.status}")
+                deferred = upstream.status == "deferred"
+                self._finish(key, NodeResult("deferred" if deferred else "skipped"))
+                return
+            try:
+                overrides += dependency.query_parameters(upstream.report.results)
+            except (KeyError, ValueError, AssertionError) as err:
+                self._finish(key, NodeResult("failed", error=f"parameters: {err}"))
+                return
+        self._ready.append((key, overrides))
+
+    def _work(self, deadline: float | None) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._ready or len(self.results) == len(self.graph.configs)
+                )
+                if not self._ready or (
+                    deadline is not None and time.monotonic() > deadline
+                ):
+                    return
+                key, overrides = self._ready.pop(0)
+            start = time.monotonic()
+            try:
+                report = self.run_monitor(key, overrides)
+                result = NodeResult(
+                    report.alert.level.name.lower(), report.seconds, report
+                )
+            except CircuitOpenError as err:
+                # Shed while Dune is unavailable, the next tick runs it again.
+                log.warning(f"deferring monitor {key}: {err}")
+                result = NodeResult(
+                    "deferred", time.monotonic() - start, error=str(err)
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                # A single failing monitor must not take down all others.
+                log.exception(f"monitor {key} failed with {err}")
+                result = NodeResult("failed", time.monotonic() - start, error=str(err))
+            with self._condition:
+                self._finish(key, result)
+
+    def run(self, deadline: float | None = None) -> dict[str, NodeResult]:
+        """
+        Executes the graph, returning one result per monitor.
+        Monitors not finished within `deadline` seconds are reported as timed out.
+        Workers are daemon threads, so they don't block process exit.
+        """
+        end = None if deadline is None else time.monotonic() + deadline
+        with self._condition:
+            for key, upstream in self.graph.upstream.items():
+                self._pending_upstream[key] = len(upstream)
+            for key, error in self.graph.errors.items():
+                self.results[key] = NodeResult("failed", error=error)
+            for key in self.graph.errors:
+                self._release(key)
+            for key, upstream in self.graph.upstream.items():
+                if not upstream and key not in self.results:
+                    self._schedule(key)
+        for i in range(min(self.max_workers, len(self.graph.configs))):
+            threading.Thread(
+                target=self._work, args=(end,), name=f"monitor-{i}", daemon=True
+            ).start()
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self.results) == len(self.graph.configs),
+                timeout=deadline,
+            )
+            return {
+                key: self.results.get(key) or NodeResult("timed out", deadline or 0.0)
+                for key in self.graph.configs
+            }
@@ -0,0 +1,159 @@
+"""
+Fan-in of monitors sharing a query but differing in one parameter:
+instead of one execution per monitor, a batched variant of the query is
+executed once per group, and its rows are split back out to the monitors
+by the group key column.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Sequence
+
+from dune_client.client import DuneClient
+from dune_client.query import Query
+from dune_client.types import DuneRecord, QueryParameter
+
+from src.memory import MemoryBudget
+from src.post.base import PostClient
+from src.query_monitor.base import QueryBase
+from src.query_monitor.factory import Config, FanIn
+from src.runner import QueryRunner, RunOptions
+
+log = logging.getLogger(__name__)
+
+
+def group_key(monitor: QueryBase, fan_in: FanIn) -> str:
+    """The value of the fan-in parameter for `monitor`"""
+    return next(p for p in monitor.base_params if p.key == fan_in.parameter).value_str()
+
+
+def _signature(monitor: QueryBase, fan_in: FanIn) -> str:
+    """Everything (but the group key) that must agree to share an execution"""
+    left_bound = getattr(monitor, "left_bound", None)
+    return repr(
+        (
+            fan_in,
+            type(monitor).__name__,
+            [str(p) for p in monitor.base_params if p.key != fan_in.parameter],
+            getattr(monitor, "window_cfg", None),
+            [str(p) for p in left_bound.as_query_parameters()] if left_bound else None,
+        )
+    )
+
+
+class FanInGroup:
+    """
+    Monitors sharing one execution of the batched query.
+    The first member to fetch executes it, all others wait for and reuse its rows
+    (or its error: a failed execution is not repeated by every member).
+    The rows of each member are held in `budget` (within the member's memory limit).
+    """
+
+    def __init__(
+        self,
+        fan_in: FanIn,
+        configs: list[Config],
+        dune: DuneClient,
+        budget: MemoryBudget | None = None,
+    ):
+        self.fan_in = fan_in
+        self.configs = configs
+        self.dune = dune
+        self.budget = budget or MemoryBudget()
+        self._rows: dict[str, Sequence[DuneRecord]] | None = None
+        self._error: Exception | None = None
+        self._lock = threading.Lock()
+
+    def query(self) -> Query:
+        """The batched query, parameterized like the first member"""
+        leader = self.configs[0].query
+        leader.refresh_parameters()
+        keys = [group_key(config.query, self.fan_in) for config in self.configs]
+        return Query(
+            name=f"{leader.name} (fan-in)",
+            query_id=self.fan_in.query_id,
+            params=[p for p in leader.parameters() if p.key != self.fan_in.parameter]
+            + [QueryParameter.text_type(self.fan_in.batch_parameter, ",".join(keys))],
+        )
+
+    def rows_for(self, key: str) -> Sequence[DuneRecord]:
+        """Rows of the batched results belonging to group `key`"""
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._rows is None:
+                query = self.query()
+                log.info(
+                    f"executing {query.name} for {len(self.configs)} monitors "
+                    f"{query.url()}"
+                )
+                ping_frequency = min(c.ping_frequency for c in self.configs)
+                limits = {
+                    group_key(config.query, self.fan_in): config.memory_limit
+                    for config in self.configs
+                }
+                rows: dict[str, list[DuneRecord]] = {key: [] for key in limits}
+                try:
+                    for row in self.dune.refresh(query, ping_frequency):
+                        key_value = str(row[self.fan_in.key_column])
+                        # Rows of no member are dropped
+                        if key_value in rows:
+                            rows[key_value].append(row)
+                except Exception as err:
+                    self._error = err
+                    raise
+                self._rows = {
+                    key: self.budget.hold(member_rows, limits[key])
+                    for key, member_rows in rows.items()
+                }
+            return self._rows.get(key, [])
+
+
+def build_groups(
+    configs: dict[str, Config], dune: DuneClient, budget: MemoryBudget | None = None
+) -> dict[str, FanInGroup]:
+    """
+    Groups fan-in monitors (by key) that can share an execution.
+    Monitors with dependencies receive parameters at runtime and
+    are never grouped, neither are groups of a single monitor.
+    """
+    groups: dict[str, list[str]] = {}
+    for key, config in configs.items():
+        if config.fan_in and not config.dependencies:
+            signature = _signature(config.query, config.fan_in)
+            groups.setdefault(signature, []).append(key)
+    result: dict[str, FanInGroup] = {}
+    for keys in groups.values():
+        if len(keys) < 2:
+            continue
+        members = [configs[key] for key in keys]
+        assert members[0].fan_in is not None
+        group = FanInGroup(members[0].fan_in, members, dune, budget)
+        result.update({key: group for key in keys})
+    return result
+
+
+class FanInRunner(QueryRunner):
+    """QueryRunner fetching its results from the shared execution of a FanInGroup"""
+
+    def __init__(
+        self,
+        query: QueryBase,
+        group: FanInGroup,
+        alerter: PostClient,
+        options: RunOptions | None = None,
+        memory_limit: int | None = None,
+    ):
+        super().__init__(
+            query,
+            group.dune,
+            alerter,
+            ping_frequency=0,
+            options=options,
+            memory_limit=memory_limit,
+        )
+        self.group = group
+
+    def fetch(self) -> Sequence[DuneRecord]:
+        return self.group.rows_for(group_key(self.query, self.group.fan_in))
@@ -0,0 +1,223 @@
+"""
+Local, columnar history of monitor results.
+Every run appends one Arrow IPC segment (readable memory mapped) to a directory
+partitioned by query and day: `<root>/query_id=<id>/date=<YYYY-MM-DD>/`.
+Rows carry the execution time and the monitor producing them (monitors may share
+a query), the segment's schema metadata the rest of the execution details, so that
+trends and post-mortems don't require re-executing queries on Dune.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from functools import cache
+from glob import glob
+from importlib import import_module
+from typing import Any, Sequence
+
+from dune_client.types import DuneRecord
+
+from src.query_monitor.base import QueryBase
+from src.runner import RunReport
+
+log = logging.getLogger(__name__)
+
+EXECUTED_AT = "_executed_at"
+MONITOR = "_monitor"
+
+
+def _as_text(values: list[Any]) -> list[str | None]:
+    """Values as text: strings as they are, anything else (e.g. arrays) as JSON"""
+    return [
+        value
+        if value is None or isinstance(value, str)
+        else json.dumps(value, default=str)
+        for value in values
+    ]
+
+
+@cache
+def _pyarrow() -> Any:
+    """pyarrow is only imported once history is actually written or read"""
+    import_module("pyarrow.ipc")
+    return import_module("pyarrow")
+
+
+class HistoryStore:
+    """Appends and reads run results below `root`"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def partition(self, query_id: int, day: date) -> str:
+        """Directory holding the segments of `query_id` on `day`"""
+        return os.path.join(self.root, f"query_id={query_id}", f"date={day}")
+
+    @staticmethod
+    def _table(rows: Sequence[DuneRecord], executed_at: datetime, monitor: str) -> Any:
+        pa = _pyarrow()
+        columns: dict[str, list[Any]] = {
+            EXECUTED_AT: [executed_at] * len(rows),
+            MONITOR: [monitor] * len(rows),
+        }
+        for index, row in enumerate(rows):
+            for column, value in row.items():
+                columns.setdefault(column, [None] * len(rows))[index] = value
+        arrays = {}
+        for column, values in columns.items():
+            try:
+                arrays[column] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Mixed value types within a column are stored as text
+                arrays[column] = pa.array(_as_text(values), pa.string())
+        return pa.table(arrays)
+
+    def append(
+        self, monitor: QueryBase, report: RunReport, executed_at: datetime | None = None
+    ) -> str:
+        """Writes the results of `report` as a new segment, returning its path"""
+        pa = _pyarrow()
+        executed_at = executed_at or datetime.now(timezone.utc)
+        table = self._table(
+            report.results, executed_at, monitor.monitor_id
+        ).replace_schema_metadata(
+            {
+                "monitor": monitor.name,
+                "monitor_id": monitor.monitor_id,
+                "query_id": str(monitor.query_id),
+                "parameters": ", ".join(str(p) for p in monitor.parameters()),
+                "executed_at": executed_at.isoformat(),
+                "seconds": f"{report.seconds:.3f}",
+                "alert_level": report.alert.level.name,
+                "alert_message": report.alert.message,
+                "row_count": str(len(report.results)),
+            }
+        )
+        directory = self.partition(monitor.query_id, executed_at.date())
+        os.makedirs(directory, exist_ok=True)
+        # Segments of a day sort in execution order (up to the microsecond).
+        path = os.path.join(
+            directory, f"{executed_at:%H%M%S%f}-{uuid.uuid4().hex[:8]}.arrow"
+        )
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return path
+
+    def segments(
+        self,
+        query_id: int,
+        start: date,
+        end: date | None = None,
+        monitor: str | None = None,
+    ) -> list[str]:
+        """
+        Segment paths of `query_id` from day `start` through `end` (inclusive),
+        only those of `monitor` (its name or monitor_id) if given.
+        """
+        end = end or start
+        paths: list[str] = []
+        for offset in range((end - start).days + 1):
+            partition = self.partition(query_id, start + timedelta(days=offset))
+            paths.extend(sorted(glob(os.path.join(partition, "*.arrow"))))
+        if monitor is None:
+            return paths
+        return [
+            path
+            for path in paths
+            if monitor
+            in (self._metadata(path).get(k) for k in ("monitor", "monitor_id"))
+        ]
+
+    @staticmethod
+    def _metadata(path: str) -> dict[str, str]:
+        """Run metadata of the segment at `path`"""
+        pa = _pyarrow()
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        return {k.decode(): v.decode() for k, v in metadata.items()}
+
+    def read(
+        self,
+        query_id: int,
+        start: date,
+        end: date | None = None,
+        monitor: str | None = None,
+    ) -> Any:
+        """
+        All stored rows of `query_id` (or only those of `monitor`)
+        within the days as one pyarrow Table
+        """
+        pa = _pyarrow()
+        tables = []
+        for path in self.segments(query_id, start, end, monitor):
+            with pa.memory_map(path) as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+        if not tables:
+            return pa.table(
+                {
+                    EXECUTED_AT: pa.array([], pa.timestamp("us", "UTC")),
+                    MONITOR: pa.array([], pa.string()),
+                }
+            )
+        return pa.concat_tables(self._unify_types(tables), promote_options="permissive")
+
+    @staticmethod
+    def _unify_types(tables: list[Any]) -> list[Any]:
+        """
+        Columns stored with incompatible types across segments are read as text.
+        Compatible ones (e.g. int64 and double) are promoted when concatenating.
+        """
+        pa = _pyarrow()
+        fields: dict[str, list[Any]] = {}
+        for table in tables:
+            for column in table.schema:
+                fields.setdefault(column.name, []).append(column)
+        incompatible = set()
+        for name, found in fields.items():
+            try:
+                pa.unify_schemas(
+                    [pa.schema([column]) for column in found],
+                    promote_options="permissive",
+                )
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                incompatible.add(name)
+        unified = []
+        for table in tables:
+            for name in incompatible & set(table.column_names):
+                text = _as_text(table.column(name).to_pylist())
+                table = table.set_column(
+                    table.column_names.index(name), name, pa.array(text, pa.string())
+                )
+            unified.append(table)
+        return unified
+
+    def records(
+        self,
+        query_id: int,
+        start: date,
+        end: date | None = None,
+        monitor: str | None = None,
+    ) -> list[DuneRecord]:
+        """
+        All stored rows of `query_id` (or only those of `monitor`)
+        within the days, including EXECUTED_AT and MONITOR
+        """
+        records: list[DuneRecord] = self.read(query_id, start, end, monitor).to_pylist()
+        return records
+
+    def runs(
+        self,
+        query_id: int,
+        start: date,
+        end: date | None = None,
+        monitor: str | None = None,
+    ) -> list[dict[str, str]]:
+        """Execution metadata of all runs of `query_id` (or `monitor`) within the days"""
+        return [
+            self._metadata(path)
+            for path in self.segments(query_id, start, end, monitor)
+        ]
@@ -0,0 +1,88 @@
+"""
+Process wide logging setup.
+Modules only ever call `logging.getLogger(__name__)`,
+entry points call `configure_logging` exactly once at startup.
+
+Handlers declared in `logging.conf` are moved behind a single QueueHandler,
+so that emitting a log record never blocks the caller on (slow) I/O.
+A background QueueListener forwards the records to the configured handlers.
+"""
+import atexit
+import copy
+import json
+import logging.config
+import queue
+from functools import cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# Loggers whose handlers are declared in logging.conf
+CONFIGURED_LOGGERS = ["", "src"]
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single line JSON objects.
+    Structured payloads passed via `extra={"data": ...}` are included as is.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        data = getattr(record, "data", None)
+        if data is not None:
+            entry["data"] = data
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Formatted by StructuredQueueHandler before the record was enqueued
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler keeping message and traceback of a record apart (unlike
+    QueueHandler.prepare, which appends the traceback to the message),
+    so formatters behind the queue can still tell them apart.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # Tracebacks are kept in exc_text only
+        record.exc_info = None
+        return record
+
+
+def _enqueue_handlers() -> QueueListener:
+    """Replaces the handlers of all configured loggers by one shared QueueHandler"""
+    handlers: list[logging.Handler] = []
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    for name in CONFIGURED_LOGGERS:
+        logger = logging.getLogger(name)
+        for handler in logger.handlers:
+            if handler not in handlers:
+                handlers.append(handler)
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Flush everything still queued when the process exits.
+    atexit.register(listener.stop)
+    return listener
+
+
+@cache
+def configure_logging(fname: str = "logging.conf") -> QueueListener:
+    """Loads logging configuration from `fname` (subsequent calls are no-ops)"""
+    logging.config.fileConfig(fname=fname, disable_existing_loggers=False)
+    return _enqueue_handlers()
@@ -0,0 +1,239 @@
+"""
+Memory bounds of fetched results.
+Results held by runs (e.g. until all monitors of a batch finished) are accounted
+against a process wide budget and an (optional) per monitor limit. Results over
+budget are spilled to temporary memory mapped files, still exposed as a Sequence
+of records (so monitors are oblivious of where their results live).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import re
+import sys
+import tempfile
+import threading
+import weakref
+from array import array
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Sequence, overload
+
+from dune_client.types import DuneRecord
+
+log = logging.getLogger(__name__)
+
+# Number of rows (evenly spread) whose size is measured to estimate a result set
+SAMPLE_ROWS = 100
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 2**10, "MB": 2**20, "GB": 2**30}
+
+
+def parse_size(size: int | str) -> int:
+    """Number of bytes of `size`, given in bytes or as a string like "256MB" """
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?B?)\s*", size.upper())
+    if not match:
+        raise ValueError(f"invalid size {size!r}, expected e.g. 512KB, 64MB or 1GB")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
+def peak_resident_bytes() -> int:
+    """
+    High-water mark of the resident set size of this process (0 where unavailable):
+    since the last reset on Linux, since the process started elsewhere.
+    """
+    try:
+        with open("/proc/self/status", "rb") as status:
+            for line in status:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 2**10
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return 0
+    # Reported in kilobytes, except on macOS (in bytes)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 2**10)
+
+
+class PeakTracker:
+    """
+    Peak resident size of the process during (possibly overlapping) runs.
+    On Linux the high-water mark is reset when a run starts, unless another run
+    is in progress, so every run observes the peak of (at least) its own duration.
+    """
+
+    def __init__(self) -> None:
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _reset() -> None:
+        try:
+            with open("/proc/self/clear_refs", "w", encoding="ascii") as clear_refs:
+                clear_refs.write("5")
+        except OSError:
+            pass
+
+    @contextmanager
+    def tracking(self) -> Iterator[None]:
+        """Context of a run, whose peak is read with `peak()` before exiting it"""
+        with self._lock:
+            if self._active == 0:
+                self._reset()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    @staticmethod
+    def peak() -> int:
+        """Peak resident size (in bytes) since the earliest run in progress started"""
+        return peak_resident_bytes()
+
+
+# Shared by all runners of the process
+PEAK_RSS = PeakTracker()
+
+
+def estimate_size(rows: Sequence[DuneRecord]) -> int:
+    """Approximate number of bytes held by `rows` (measured on a sample)"""
+    if not rows:
+        return sys.getsizeof(rows)
+    step = max(1, len(rows) // SAMPLE_ROWS)
+    sample = rows[::step]
+    # Keys are shared between the records of a decoded response.
+    sample_size = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+        for row in sample
+    )
+    return sys.getsizeof(rows) + sample_size * len(rows) // len(sample)
+
+
+class HeldRows(list):  # type: ignore[type-arg]
+    """In memory results, accounted against a MemoryBudget for as long as they live"""
+
+
+class SpilledRows(Sequence[DuneRecord]):
+    """
+    Results stored in a temporary (unlinked) memory mapped file, one JSON record per line.
+    Records are decoded on access, so values not representable in JSON become strings.
+    """
+
+    def __init__(self, rows: Iterable[DuneRecord], directory: str | None = None):
+        # pylint: disable=consider-using-with
+        file = tempfile.TemporaryFile(prefix="results-", dir=directory)
+        self._offsets = array("Q", [0])
+        for row in rows:
+            line = json.dumps(row, default=str).encode() + b"\n"
+            file.write(line)
+            self._offsets.append(self._offsets[-1] + len(line))
+        file.flush()
+        # Empty files can not be mapped
+        self._mmap = (
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self) > 0
+            else None
+        )
+        weakref.finalize(self, SpilledRows._close, self._mmap, file)
+
+    @staticmethod
+    def _close(mapped: mmap.mmap | None, file: Any) -> None:
+        if mapped is not None:
+            mapped.close()
+        file.close()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the spill file"""
+        return self._offsets[-1]
+
+    def _row(self, index: int) -> DuneRecord:
+        assert self._mmap is not None
+        record: DuneRecord = json.loads(
+            self._mmap[self._offsets[index] : self._offsets[index + 1]]
+        )
+        return record
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> DuneRecord:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[DuneRecord]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> DuneRecord | list[DuneRecord]:
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"result index {index} out of range")
+        return self._row(index % len(self))
+
+    def __iter__(self) -> Iterator[DuneRecord]:
+        return (self._row(i) for i in range(len(self)))
+
+
+class MemoryBudget:
+    """
+    Bytes of results held in memory by all runs of the process (at most `limit`),
+    and by a single run (at most `monitor_limit`, unless configured per monitor).
+    No limits means all results are kept in memory (while still being accounted).
+    """
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        monitor_limit: int | None = None,
+        spill_dir: str | None = None,
+    ):
+        self.limit = limit
+        self.monitor_limit = monitor_limit
+        self.spill_dir = spill_dir
+        self.used = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, nbytes: int) -> bool:
+        with self._lock:
+            if self.limit is not None and self.used + nbytes > self.limit:
+                return False
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def _release(self, nbytes: int) -> None:
+        with self._lock:
+            self.used -= nbytes
+
+    def hold(
+        self, rows: Sequence[DuneRecord], limit: int | None = None
+    ) -> HeldRows | SpilledRows:
+        """
+        Keeps `rows` in memory if within `limit` (default `monitor_limit`) and
+        the global budget, spilling them to disk otherwise.
+        Memory is released from the budget once the returned rows are collected.
+        Rows already held (or spilled), e.g. by a FanInGroup, are returned as is.
+        """
+        if isinstance(rows, (HeldRows, SpilledRows)):
+            return rows
+        nbytes = estimate_size(rows)
+        limit = self.monitor_limit if limit is None else limit
+        if (limit is None or nbytes <= limit) and self._reserve(nbytes):
+            held = HeldRows(rows)
+            weakref.finalize(held, self._release, nbytes)
+            return held
+        log.info(
+            f"spilling {len(rows)} results (~{nbytes} bytes) to disk, "
+            f"{self.used} of {self.limit} budgeted bytes in use"
+        )
+        return SpilledRows(rows, self.spill_dir)
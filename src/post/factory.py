@@ -0,0 +1,57 @@
+"""
+Factory method to construct the PostClient requested by a query configuration.
+Client implementations are resolved lazily, so that e.g. `tweepy` is never
+imported by a deployment that only posts to slack.
+"""
+import os
+import threading
+
+from src.post.base import PostClient
+from src.alert import AlertType
+from src.registry import LazyRegistry
+
+POST_CLIENTS: LazyRegistry[AlertType] = LazyRegistry(
+    {
+        AlertType.SLACK: "src.slack_client.BasicSlackClient",
+        AlertType.TWITTER: "src.post.twitter.TwitterClient",
+    }
+)
+
+
+def get_post_client(alert_type: AlertType, alert_channel: str | None) -> PostClient:
+    """Constructs the PostClient for `alert_type` with credentials from environment"""
+    client: PostClient
+    if alert_type == AlertType.SLACK:
+        client = POST_CLIENTS.get(alert_type)(
+            token=os.environ["SLACK_TOKEN"],
+            # Use specified channel, or default to "global config"
+            channel=alert_channel or os.environ["SLACK_ALERT_CHANNEL"],
+        )
+    elif alert_type == AlertType.TWITTER:
+        client = POST_CLIENTS.get(alert_type)(
+            credentials={
+                "consumer_key": os.environ["CONSUMER_KEY"],
+                "consumer_secret": os.environ["CONSUMER_SECRET"],
+                "access_token": os.environ["ACCESS_TOKEN"],
+                "access_token_secret": os.environ["ACCESS_TOKEN_SECRET"],
+            }
+        )
+    else:
+        raise ValueError(f"Invalid or unsupported AlertType {alert_type}")
+    return client
+
+
+class PostClientCache:
+    """Shares one (thread-safe) PostClient per destination, i.e. type and channel"""
+
+    def __init__(self) -> None:
+        self._clients: dict[tuple[AlertType, str | None], PostClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, alert_type: AlertType, alert_channel: str | None) -> PostClient:
+        """Returns the cached client for the destination, constructing it once"""
+        with self._lock:
+            key = (alert_type, alert_channel)
+            if key not in self._clients:
+                self._clients[key] = get_post_client(alert_type, alert_channel)
+            return self._clients[key]
@@ -1,13 +1,16 @@
 """
 Abstract class containing Base/Default QueryMonitor attributes.
 """
+import hashlib
 from abc import ABC, abstractmethod
+from typing import Any, Sequence
 
 from dune_client.types import DuneRecord, QueryParameter
 from dune_client.query import Query
 
 
-from src.alert import Alert
+from src.alert import Alert, AlertType
+from src.template import Excerpt, MessageTemplate
 
 
 class QueryBase(ABC):
@@ -16,8 +19,34 @@ class QueryBase(ABC):
     that are extended on in some implementations.
     """
 
+    # Template of alert messages and the fields available to it (besides `excerpt`),
+    # along with a representative value each (validating format specs).
+    DEFAULT_MESSAGE = (
+        "{name} - detected {num_results} cases. Results available at {url}"
+    )
+    MESSAGE_FIELDS: dict[str, Any] = {
+        "name": "",
+        "query_id": 0,
+        "url": "",
+        "num_results": 0,
+    }
+
     def __init__(self, query: Query):
         self.query = query
+        self.message = self.message_template(
+            self.DEFAULT_MESSAGE, AlertType.SLACK.max_length
+        )
+        # Parameters fixed by configuration. Implementations derive the
+        # execution parameters from these, so they never accumulate on `query`.
+        self.base_params = list(query.parameters())
+        # Tells apart monitors of the same query (e.g. fan-in members), unaffected
+        # by parameters later overridden by upstream monitors.
+        digest = hashlib.sha1(
+            "&".join(
+                sorted(f"{p.key}={p.value_str()}" for p in self.base_params)
+            ).encode()
+        ).hexdigest()
+        self.monitor_id = f"{query.name}@{digest[:8]}"
 
     @property
     def query_id(self) -> int:
@@ -35,12 +64,54 @@ class QueryBase(ABC):
         """
         return self.query.parameters()
 
+    def override_parameters(self, params: list[QueryParameter]) -> None:
+        """
+        Replaces configured parameters having the same key as any of `params`
+        (those without counterpart are appended), e.g. values of upstream monitors.
+        """
+        overrides = {param.key: param for param in params}
+
+        def merge(current: list[QueryParameter]) -> list[QueryParameter]:
+            keys = {param.key for param in current}
+            return [overrides.get(param.key, param) for param in current] + [
+                param for param in params if param.key not in keys
+            ]
+
+        self.base_params = merge(self.base_params)
+        self.query.params = merge(self.query.parameters())
+
+    def refresh_parameters(self) -> None:
+        """
+        Recomputes time dependent parameters (e.g. rolling windows)
+        from the stored configuration. Called before every execution.
+        The default implementation has none.
+        """
+
     def result_url(self) -> str:
         """Returns a link to query results excluding fixed parameters"""
         return self.query.url()
 
+    def message_template(
+        self, template: str, max_length: int, excerpt: Excerpt | None = None
+    ) -> MessageTemplate:
+        """Compiles `template` against the message fields of this monitor"""
+        return MessageTemplate(template, self.MESSAGE_FIELDS, max_length, excerpt)
+
+    def render_message(self, results: Sequence[DuneRecord], **fields: Any) -> str:
+        """Renders `self.message` for `results` with implementation specific `fields`"""
+        return self.message.render(
+            {
+                "name": self.name,
+                "query_id": self.query_id,
+                "url": self.result_url(),
+                "num_results": len(results),
+                **fields,
+            },
+            results,
+        )
+
     @abstractmethod
-    def get_alert(self, results: list[DuneRecord]) -> Alert:
+    def get_alert(self, results: Sequence[DuneRecord]) -> Alert:
         """
         Default Alert message if not special implementation is provided.
         Says which query returned how many results along with a link to Dune.
@@ -1,5 +1,7 @@
 """QueryMonitor for Counters. Alert set to valuation"""
 
+from typing import Sequence
+
 from dune_client.types import DuneRecord
 from dune_client.query import Query
 
@@ -12,6 +14,16 @@ class CounterQueryMonitor(QueryBase):
     All queries here, must return a single record specifying a column with numeric type.
     """
 
+    DEFAULT_MESSAGE = (
+        "Query {name}: {column} exceeds {alert_value} with {value} (cf. {url})"
+    )
+    MESSAGE_FIELDS = {
+        **QueryBase.MESSAGE_FIELDS,
+        "column": "",
+        "alert_value": 0.0,
+        "value": 0.0,
+    }
+
     def __init__(
         self,
         query: Query,
@@ -22,16 +34,20 @@ class CounterQueryMonitor(QueryBase):
         self.column = column
         self.alert_value = alert_value
 
-    def _result_value(self, results: list[DuneRecord]) -> float:
+    def _result_value(self, results: Sequence[DuneRecord]) -> float:
         assert len(results) == 1, f"Expected single record, got {results}"
         return float(results[0][self.column])
 
-    def get_alert(self, results: list[DuneRecord]) -> Alert:
+    def get_alert(self, results: Sequence[DuneRecord]) -> Alert:
         result_value = self._result_value(results)
         if result_value > self.alert_value:
             return Alert.slack(
-                message=f"Query {self.name}: {self.column} exceeds {self.alert_value} "
-                f"with {self._result_value(results)} (cf. {self.result_url()})",
+                message=self.render_message(
+                    results,
+                    column=self.column,
+                    alert_value=self.alert_value,
+                    value=result_value,
+                ),
             )
         return Alert.log(
             message=f"value of {self.column} = {result_value} "
@@ -3,35 +3,107 @@ Factory method to load QueryMonitor object from yaml configuration files
 """
 from __future__ import annotations
 
-import logging.config
-from dataclasses import dataclass
-from enum import Enum
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Sequence
 
 import yaml
 from dune_client.query import Query
-from dune_client.types import QueryParameter
+from dune_client.types import DuneRecord, QueryParameter
 
+from src.alert import AlertLevel, AlertType
+from src.memory import parse_size
 from src.models import TimeWindow, LeftBound
 from src.query_monitor.base import QueryBase
-from src.query_monitor.counter import CounterQueryMonitor
-from src.query_monitor.left_bounded import LeftBoundedQueryMonitor
-from src.query_monitor.result_threshold import ResultThresholdQuery
-from src.query_monitor.windowed import WindowedQueryMonitor
+from src.registry import LazyRegistry
+from src.template import Excerpt
 
 log = logging.getLogger(__name__)
-logging.config.fileConfig(fname="logging.conf", disable_existing_loggers=False)
 
+# libyaml's C implementation is an order of magnitude faster than the pure python one
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-class AlertType(Enum):
-    """Supported Alert Frameworks."""
+# Monitor implementations are only imported once a config asks for them.
+MONITOR_TYPES: LazyRegistry[str] = LazyRegistry(
+    {
+        "windowed": "src.query_monitor.windowed.WindowedQueryMonitor",
+        "left_bounded": "src.query_monitor.left_bounded.LeftBoundedQueryMonitor",
+        "counter": "src.query_monitor.counter.CounterQueryMonitor",
+        "result_threshold": "src.query_monitor.result_threshold.ResultThresholdQuery",
+    }
+)
 
-    SLACK = "slack"
-    TWITTER = "twitter"
+
+@dataclass
+class Dependency:
+    """
+    Dependency on an upstream monitor (referenced by name):
+    the dependent monitor only runs when the upstream run alerted at `level` or above.
+    `parameters` of the dependent query are taken from the first upstream result,
+    each given by `key`, `type` and the upstream `column` holding its value.
+    """
+
+    monitor: str
+    level: AlertLevel = AlertLevel.SLACK
+    parameters: list[dict[str, str]] = field(default_factory=list)
 
     @classmethod
-    def from_str(cls, val: str) -> AlertType:
-        """From string constructor"""
-        return cls(val.lower())
+    def from_cfg(cls, cfg: dict[str, Any]) -> Dependency:
+        """Loads Dependency from a `depends_on` entry"""
+        return cls(
+            monitor=cfg["monitor"],
+            level=AlertLevel[cfg.get("level", "slack").upper()],
+            parameters=cfg.get("parameters", []),
+        )
+
+    def is_satisfied(self, level: AlertLevel) -> bool:
+        """Whether an upstream alert of `level` triggers the dependent monitor"""
+        return level.value >= self.level.value
+
+    def query_parameters(self, results: Sequence[DuneRecord]) -> list[QueryParameter]:
+        """Parameters for the dependent query from upstream `results`"""
+        if not self.parameters:
+            return []
+        if not results:
+            raise ValueError(f"no results of {self.monitor} to take parameters from")
+        row = results[0]
+        return [
+            QueryParameter.from_dict(
+                {
+                    "key": param["key"],
+                    "type": param["type"],
+                    "value": row[param["column"]]
+                    if param["type"] == "number"
+                    else str(row[param["column"]]),
+                }
+            )
+            for param in self.parameters
+        ]
+
+
+@dataclass(frozen=True)
+class FanIn:
+    """
+    Batched variant of a query shared by monitors differing only in `parameter`.
+    The batched query `query_id` receives the values of `parameter` of all
+    monitors (comma separated) as text parameter `batch_parameter`
+    and must return column `key_column` identifying the monitor of each row.
+    """
+
+    query_id: int
+    key_column: str
+    parameter: str
+    batch_parameter: str
+
+    @classmethod
+    def from_cfg(cls, cfg: dict[str, Any]) -> FanIn:
+        """Loads FanIn from the `fan_in` section of a config"""
+        return cls(
+            query_id=int(cfg["query_id"]),
+            key_column=cfg["key_column"],
+            parameter=cfg["parameter"],
+            batch_parameter=cfg["batch_parameter"],
+        )
 
 
 @dataclass
@@ -42,15 +114,137 @@ class Config:
 
     query: QueryBase
     ping_frequency: int
-    alert_channel: str
+    alert_channel: str | None
     alert_type: AlertType
+    dependencies: list[Dependency] = field(default_factory=list)
+    fan_in: FanIn | None = None
+    # Bytes of results kept in memory by a run, beyond which they are spilled
+    memory_limit: int | None = None
+
+
+# Supported configuration keys along with their accepted types
+CONFIG_SCHEMA: dict[str, tuple[type, ...]] = {
+    "name": (str,),
+    "id": (int,),
+    "parameters": (list,),
+    "window": (dict, str),
+    "left_bound": (dict,),
+    "column": (str,),
+    "alert_value": (int, float),
+    "threshold": (int,),
+    "alert_channel": (str,),
+    "ping_frequency": (int,),
+    "alert_type": (str,),
+    "depends_on": (list,),
+    "fan_in": (dict,),
+    "message": (str,),
+    "excerpt": (dict,),
+    "memory_limit": (int, str),
+}
+REQUIRED_KEYS = ["name", "id"]
+
+
+def _dependency_errors(cfg: dict[str, Any]) -> list[str]:
+    errors = []
+    for dependency in cfg.get("depends_on") or []:
+        if not isinstance(dependency, dict) or not isinstance(
+            dependency.get("monitor"), str
+        ):
+            errors.append(f"dependency {dependency} requires a monitor name")
+        elif (
+            not isinstance(dependency.get("level", "slack"), str)
+            or dependency.get("level", "slack").upper() not in AlertLevel.__members__
+        ):
+            errors.append(f"dependency {dependency} has invalid level")
+        elif not isinstance(dependency.get("parameters", []), list):
+            errors.append(f"dependency {dependency} parameters must be a list")
+        elif any(
+            not isinstance(param, dict) or not {"key", "type", "column"} <= set(param)
+            for param in dependency.get("parameters", [])
+        ):
+            errors.append(f"dependency {dependency} parameters need key, type, column")
+    return errors
+
+
+def _fan_in_errors(cfg: dict[str, Any]) -> list[str]:
+    fan_in = cfg.get("fan_in")
+    if not isinstance(fan_in, dict):
+        return []
+    missing = {"query_id", "key_column", "parameter", "batch_parameter"} - set(fan_in)
+    if missing:
+        return [f"fan_in is missing {sorted(missing)}"]
+    configured = [
+        param.get("key")
+        for param in cfg.get("parameters") or []
+        if isinstance(param, dict)
+    ]
+    if fan_in["parameter"] not in configured:
+        return [f"fan_in parameter {fan_in['parameter']} is not configured"]
+    return []
+
+
+def _excerpt_errors(cfg: dict[str, Any]) -> list[str]:
+    excerpt = cfg.get("excerpt")
+    if not isinstance(excerpt, dict):
+        return []
+    errors = [
+        f"unknown excerpt key '{key}'"
+        for key in excerpt
+        if key not in ("rows", "order_by", "columns")
+    ]
+    if not isinstance(excerpt.get("rows", 0), int):
+        errors.append("excerpt rows must be an integer")
+    if not isinstance(excerpt.get("order_by") or "", str):
+        errors.append("excerpt order_by must be a column name")
+    columns = excerpt.get("columns", [])
+    if not isinstance(columns, list) or not all(isinstance(c, str) for c in columns):
+        errors.append("excerpt columns must be a list of column names")
+    return errors
+
+
+def validate_config(cfg: Any) -> None:
+    """
+    Validates the structure of a parsed yaml config against CONFIG_SCHEMA.
+    Raises ValueError listing all problems found.
+    """
+    if not isinstance(cfg, dict):
+        raise ValueError(f"Expected mapping at top level of config, got {cfg}")
+    errors = [
+        f"missing required key '{key}'" for key in REQUIRED_KEYS if key not in cfg
+    ]
+    for key, value in cfg.items():
+        if key not in CONFIG_SCHEMA:
+            errors.append(f"unknown key '{key}'")
+        elif not isinstance(value, CONFIG_SCHEMA[key]) or isinstance(value, bool):
+            expected = " or ".join(t.__name__ for t in CONFIG_SCHEMA[key])
+            errors.append(f"'{key}' must be of type {expected}, got {value!r}")
+    for param in cfg.get("parameters") or []:
+        if not isinstance(param, dict) or not {"key", "type", "value"} <= set(param):
+            errors.append(f"parameter {param} requires key, type and value")
+    errors += _dependency_errors(cfg) + _fan_in_errors(cfg) + _excerpt_errors(cfg)
+    if isinstance(cfg.get("memory_limit"), str):
+        try:
+            parse_size(cfg["memory_limit"])
+        except ValueError as err:
+            errors.append(str(err))
+    if errors:
+        raise ValueError(f"Invalid config: {'; '.join(errors)}")
 
 
 def load_config(config_yaml: str) -> Config:
     """Loads a QueryMonitor object from yaml configuration file"""
     with open(config_yaml, "r", encoding="utf-8") as yaml_file:
-        cfg = yaml.load(yaml_file, yaml.Loader)
+        cfg = yaml.load(yaml_file, YamlLoader)
     log.debug(f"config {config_yaml} loaded as {cfg}")
+    try:
+        validate_config(cfg)
+    except ValueError as err:
+        raise ValueError(f"{config_yaml}: {err}") from err
+    return parse_config(cfg)
+
+
+def parse_config(cfg: dict[str, Any]) -> Config:
+    """Constructs Config (and its QueryMonitor) from validated yaml content"""
     query = Query(
         name=cfg["name"],
         query_id=cfg["id"],
@@ -65,17 +259,27 @@ def load_config(config_yaml: str) -> Config:
     if "window" in cfg:
         # Windowed Query
         window = TimeWindow.from_cfg(cfg["window"])
-        base_query = WindowedQueryMonitor(query, window, threshold)
+        base_query = MONITOR_TYPES.get("windowed")(
+            query, window, threshold, window_cfg=cfg["window"]
+        )
     elif "left_bound" in cfg:
         # Left Bounded Query
         left_bound = LeftBound.from_cfg(cfg["left_bound"])
-        base_query = LeftBoundedQueryMonitor(query, left_bound, threshold)
+        base_query = MONITOR_TYPES.get("left_bounded")(query, left_bound, threshold)
     elif "column" in cfg and "alert_value" in cfg:
         # Counter Query
         column, alert_value = cfg["column"], float(cfg["alert_value"])
-        base_query = CounterQueryMonitor(query, column, alert_value)
+        base_query = MONITOR_TYPES.get("counter")(query, column, alert_value)
     else:
-        base_query = ResultThresholdQuery(query, threshold)
+        base_query = MONITOR_TYPES.get("result_threshold")(query, threshold)
+
+    alert_type = AlertType.from_str(cfg.get("alert_type", "slack"))
+    # Compiled (and validated) once, for all runs of the monitor
+    base_query.message = base_query.message_template(
+        cfg.get("message", base_query.DEFAULT_MESSAGE),
+        max_length=alert_type.max_length,
+        excerpt=Excerpt.from_cfg(cfg["excerpt"]) if "excerpt" in cfg else None,
+    )
 
     config_obj = Config(
         query=base_query,
@@ -83,7 +287,12 @@ def load_config(config_yaml: str) -> Config:
         # This is 4x the DuneClient default of 5 seconds
         ping_frequency=cfg.get("ping_frequency", 20),
         # Slack is the default alert type.
-        alert_type=AlertType.from_str(cfg.get("alert_type", "slack")),
+        alert_type=alert_type,
+        dependencies=[Dependency.from_cfg(dep) for dep in cfg.get("depends_on", [])],
+        fan_in=FanIn.from_cfg(cfg["fan_in"]) if "fan_in" in cfg else None,
+        memory_limit=(
+            parse_size(cfg["memory_limit"]) if "memory_limit" in cfg else None
+        ),
     )
     log.debug(f"config parsed as {config_obj}")
     return config_obj
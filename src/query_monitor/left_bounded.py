@@ -21,4 +21,5 @@ class LeftBoundedQueryMonitor(ResultThresholdQuery):
     ):
         super().__init__(query, threshold)
         self.left_bound = left_bound
-        self.query.params = self.query.parameters() + left_bound.as_query_parameters()
+        # The bound is relative (i.e. evaluated by Dune), so it never needs refreshing
+        self.query.params = self.base_params + left_bound.as_query_parameters()
@@ -0,0 +1,88 @@
+"""
+Loads a whole directory of query configurations.
+Parsed Config objects are cached by file path and modification time,
+so repeated polling only re-parses files that actually changed.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass, field
+from glob import glob
+
+from src.query_monitor.factory import Config, load_config
+
+log = logging.getLogger(__name__)
+
+CONFIG_EXTENSIONS = ("*.yaml", "*.yml")
+
+
+@dataclass
+class ConfigChanges:
+    """Configs (by path) that were added or modified and those that were removed"""
+
+    updated: dict[str, Config] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.updated or self.removed)
+
+
+class ConfigLoader:
+    """
+    Loads all yaml configs contained in `directory`.
+    Invalid files are logged and skipped, without affecting the remaining configs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # path -> (mtime, Config)
+        self._cache: dict[str, tuple[int, Config]] = {}
+        # path -> mtime of a version that failed to load (to avoid re-parsing it)
+        self._failed: dict[str, int] = {}
+
+    def paths(self) -> list[str]:
+        """Sorted list of config files currently in the directory"""
+        return sorted(
+            path
+            for pattern in CONFIG_EXTENSIONS
+            for path in glob(os.path.join(self.directory, pattern))
+        )
+
+    def configs(self) -> dict[str, Config]:
+        """All successfully loaded configs keyed by path"""
+        return {path: config for path, (_, config) in self._cache.items()}
+
+    def poll(self) -> ConfigChanges:
+        """Rescans the directory, (re)loading only new and modified files"""
+        changes = ConfigChanges()
+        paths = self.paths()
+        for path in paths:
+            mtime = os.stat(path).st_mtime_ns
+            cached = self._cache.get(path)
+            if (cached and cached[0] == mtime) or self._failed.get(path) == mtime:
+                continue
+            try:
+                config = load_config(path)
+            # Validation is shallow, one broken file must not take down the daemon.
+            except Exception as err:  # pylint: disable=broad-except
+                log.error(f"failed to load config {path}: {err}")
+                self._failed[path] = mtime
+                continue
+            self._failed.pop(path, None)
+            self._cache[path] = (mtime, config)
+            changes.updated[path] = config
+        for path in set(self._cache) - set(paths):
+            del self._cache[path]
+            changes.removed.append(path)
+        if changes:
+            log.info(
+                f"configs updated: {sorted(changes.updated)}, "
+                f"removed: {sorted(changes.removed)}"
+            )
+        return changes
+
+    def load_all(self) -> dict[str, Config]:
+        """Brings the cache up to date and returns all loaded configs"""
+        self.poll()
+        return self.configs()
@@ -2,6 +2,8 @@
 Elementary implementation of QueryBase that alerts when
 number of results returned is > `threshold`
 """
+from typing import Sequence
+
 from dune_client.types import DuneRecord
 from dune_client.query import Query
 
@@ -12,11 +14,13 @@ from src.query_monitor.base import QueryBase
 class ResultThresholdQuery(QueryBase):
     """This is essentially the base query monitor with all default methods"""
 
+    MESSAGE_FIELDS = {**QueryBase.MESSAGE_FIELDS, "threshold": 0}
+
     def __init__(self, query: Query, threshold: int = 0):
         super().__init__(query)
         self.threshold = threshold
 
-    def get_alert(self, results: list[DuneRecord]) -> Alert:
+    def get_alert(self, results: Sequence[DuneRecord]) -> Alert:
         """
         Default Alert message if not special implementation is provided.
         Says which query returned how many results along with a link to Dune.
@@ -25,7 +29,6 @@ class ResultThresholdQuery(QueryBase):
         if num_results > self.threshold:
             return Alert(
                 level=AlertLevel.SLACK,
-                message=f"{self.name} - detected {num_results} cases. "
-                f"Results available at {self.result_url()}",
+                message=self.render_message(results, threshold=self.threshold),
             )
         return Alert.log("No alert-worthy results detected.")
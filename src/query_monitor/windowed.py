@@ -2,7 +2,7 @@
 Implementation of BaseQueryMonitor for "windowed" queries having StartTime and EndTime
 """
 from __future__ import annotations
-import logging.config
+import logging
 from datetime import datetime, timedelta
 
 from dune_client.query import Query
@@ -11,13 +11,14 @@ from src.models import TimeWindow
 from src.query_monitor.result_threshold import ResultThresholdQuery
 
 log = logging.getLogger(__name__)
-logging.config.fileConfig(fname="logging.conf", disable_existing_loggers=False)
 
 
 class WindowedQueryMonitor(ResultThresholdQuery):
     """
     All queries here, must have `StartTime` and `EndTime` as parameters,
     set by an instance's window attribute via window.as_query_parameters()
+    When constructed with `window_cfg`, the window is rolled forward
+    (i.e. reevaluated relative to the current time) on every refresh.
     """
 
     window: TimeWindow
@@ -27,11 +28,15 @@ class WindowedQueryMonitor(ResultThresholdQuery):
         query: Query,
         window: TimeWindow,
         threshold: int = 0,
+        window_cfg: dict[str, int] | str | None = None,
     ):
         super().__init__(query, threshold)
+        self.window_cfg = window_cfg
         self._set_window(window)
-        # Need to update the Query Parameters
-        self.query.params = self.query.parameters() + self.window.as_query_parameters()
+
+    def refresh_parameters(self) -> None:
+        if self.window_cfg is not None:
+            self._set_window(TimeWindow.from_cfg(self.window_cfg))
 
     def _set_window(self, window: TimeWindow) -> None:
         if window.end > datetime.now() - timedelta(hours=2):
@@ -40,3 +45,5 @@ class WindowedQueryMonitor(ResultThresholdQuery):
                 "some data may not yet be available"
             )
         self.window = window
+        # Need to update the Query Parameters
+        self.query.params = self.base_params + self.window.as_query_parameters()
@@ -0,0 +1,33 @@
+"""
+Lazy registry mapping keys onto dotted import paths.
+Targets (and any heavy third party modules they pull in) are only imported
+the first time a key is actually looked up.
+"""
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class LazyRegistry(Generic[K]):
+    """Resolves `module.path.Name` entries on demand and caches the result"""
+
+    def __init__(self, entries: dict[K, str]):
+        self.entries = entries
+        self._loaded: dict[K, Any] = {}
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.entries
+
+    def get(self, key: K) -> Any:
+        """Imports (once) and returns the object registered under `key`"""
+        if key not in self._loaded:
+            try:
+                path = self.entries[key]
+            except KeyError as err:
+                raise ValueError(f"Nothing registered for {key}") from err
+            module_name, _, attr = path.rpartition(".")
+            self._loaded[key] = getattr(import_module(module_name), attr)
+        return self._loaded[key]
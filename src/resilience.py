@@ -0,0 +1,220 @@
+"""
+Fault tolerance of Dune API calls: transient failures (timeouts, connection errors,
+429 and 5xx responses) are retried with jittered exponential backoff, and
+every endpoint has a circuit breaker shared by all monitors of the process.
+Only reads (GET status/results) are retried on any transient failure. POSTs are
+not idempotent (a repeated execute starts another, billed, execution), so they
+are only retried when Dune surely did not process them: on failures to connect
+and on 429/503 responses.
+While a breaker is open, calls fail fast with CircuitOpenError (so monitor runs
+are deferred) instead of hammering an API that is already struggling.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+from dune_client.client import DuneClient
+from urllib3.exceptions import NewConnectionError
+
+log = logging.getLogger(__name__)
+
+# Responses worth retrying (everything else is handled by DuneClient)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Responses of requests Dune did not process (safe to retry for POSTs)
+REJECTED_STATUSES = frozenset({429, 503})
+# Timeout (in seconds) of a single request, as in DuneClient
+REQUEST_TIMEOUT = 10
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Up to `attempts` tries, waiting a random time up to base * 2^n (max `cap`)"""
+
+    attempts: int = 4
+    base: float = 1.0
+    cap: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after failed `attempt` (counting from 0), "full jitter" """
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures, rejecting all calls for
+    `reset_timeout` seconds. Then a single trial call is let through (half open):
+    its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """One of "closed", "open" and "half open" """
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half open"
+        return "open"
+
+    def allow(self) -> None:
+        """Raises CircuitOpenError unless a call may be made right now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half open" and not self._trial:
+                self._trial = True
+                return
+            assert self.opened_at is not None
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(
+                f"circuit of {self.name} is {state} (retry in {max(retry_in, 0):.0f}s)"
+            )
+
+    def record_success(self) -> None:
+        """Closes the breaker"""
+        with self._lock:
+            if self.opened_at is not None:
+                log.info(f"circuit of {self.name} closed")
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the breaker at the threshold (or on a failed trial)"""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (
+                self.opened_at is None and self.failures >= self.threshold
+            ):
+                log.warning(
+                    f"circuit of {self.name} opened after {self.failures} failures"
+                )
+                self.opened_at, self._trial = time.monotonic(), False
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current state for metrics"""
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+class CircuitBreakers:
+    """Circuit breakers by endpoint, created on first use"""
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """The circuit breaker of `endpoint`"""
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    endpoint, self.threshold, self.reset_timeout
+                )
+            return self._breakers[endpoint]
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """State of all breakers by endpoint"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.snapshot() for endpoint, breaker in breakers.items()}
+
+
+# Shared by all clients (i.e. monitors) of the process
+BREAKERS = CircuitBreakers()
+
+
+def retryable(method: str, error: Exception) -> bool:
+    """Whether a `method` request failing with (transient) `error` may be repeated"""
+    if method == "GET":
+        return True
+    if isinstance(error, requests.HTTPError):
+        return (
+            error.response is not None
+            and error.response.status_code in REJECTED_STATUSES
+        )
+    # Failed to connect, i.e. before anything was sent
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectTimeout) or isinstance(
+        reason, NewConnectionError
+    )
+
+
+def endpoint_name(url: str) -> str:
+    """Endpoint of `url` independent of its ids, e.g. .../execution/01AB/status -> status"""
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+class ResilientDuneClient(DuneClient):
+    """DuneClient retrying transient failures and respecting circuit breakers"""
+
+    def __init__(
+        self,
+        api_key: str,
+        retry: RetryPolicy | None = None,
+        breakers: CircuitBreakers = BREAKERS,
+    ):
+        super().__init__(api_key)
+        self.retry = retry or RetryPolicy()
+        self.breakers = breakers
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        breaker = self.breakers.get(endpoint_name(url))
+        for attempt in range(self.retry.attempts):
+            breaker.allow()
+            try:
+                response = requests.request(
+                    method,
+                    url,
+                    headers={"x-dune-api-key": self.token},
+                    timeout=REQUEST_TIMEOUT,
+                    **kwargs,
+                )
+            except (requests.ConnectionError, requests.Timeout) as err:
+                error: Exception = err
+            except BaseException:
+                # Unexpected failures are not retried, but must still release
+                # the breaker (e.g. a half open trial) and count as failure.
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return self._handle_response(response)
+                error = requests.HTTPError(
+                    f"{response.status_code} response from {url}", response=response
+                )
+            breaker.record_failure()
+            if attempt + 1 == self.retry.attempts or not retryable(method, error):
+                raise error
+            wait = self.retry.backoff(attempt)
+            log.warning(f"{method} {url} failed with {error}, retrying in {wait:.1f}s")
+            time.sleep(wait)
+        raise AssertionError("retry policy requires at least one attempt")
+
+    def _get(self, url: str) -> Any:
+        log.debug(f"GET received input url={url}")
+        return self._request("GET", url)
+
+    def _post(self, url: str, params: Any) -> Any:
+        log.debug(f"POST received input url={url}, params={params}")
+        return self._request("POST", url, json=params)
@@ -5,16 +5,69 @@ passing results onto the query and alerting when necessary.
 """
 from __future__ import annotations
 
-import logging.config
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Sequence, TYPE_CHECKING
 
 from dune_client.client import DuneClient
+from dune_client.types import DuneRecord
 
-from src.alert import AlertLevel
+from src.alert import Alert, AlertLevel
+from src.memory import PEAK_RSS, MemoryBudget, SpilledRows
 from src.post.base import PostClient
 from src.query_monitor.base import QueryBase
 
+if TYPE_CHECKING:
+    # Only imported for annotations, pyarrow is loaded once history is written
+    from src.history import HistoryStore
+
 log = logging.getLogger(__name__)
-logging.config.fileConfig(fname="logging.conf", disable_existing_loggers=False)
+
+# Number of result rows included in alert log entries
+LOGGED_ROWS = 5
+
+
+def summarize_results(
+    results: Sequence[DuneRecord], max_rows: int = LOGGED_ROWS
+) -> dict[str, Any]:
+    """
+    Bounded summary of a result set: row count, column schema and first `max_rows`.
+    The schema is taken from the first record.
+    """
+    return {
+        "row_count": len(results),
+        "columns": {
+            column: type(value).__name__
+            for column, value in (results[0].items() if results else [])
+        },
+        "rows": results[:max_rows],
+    }
+
+
+@dataclass
+class RunReport:
+    """Outcome of a single run: the alert along with the results it was based on"""
+
+    alert: Alert
+    results: Sequence[DuneRecord]
+    seconds: float
+    # Peak resident size of the process during the run (in bytes)
+    peak_rss: int = 0
+
+
+@dataclass
+class RunOptions:
+    """Optional outputs of runs, shared by all runners of a batch or daemon"""
+
+    # Side file receiving the full result set of alerting runs
+    result_dump: str | None = None
+    # Local store receiving the results of every run
+    history: HistoryStore | None = None
+    # Bounds the memory held by results (spilling them to disk beyond)
+    budget: MemoryBudget = field(default_factory=MemoryBudget)
 
 
 class QueryRunner:
@@ -28,22 +81,83 @@ class QueryRunner:
         dune: DuneClient,
         alerter: PostClient,
         ping_frequency: int,
+        *,
+        options: RunOptions | None = None,
+        memory_limit: int | None = None,
     ):
         self.query = query
         self.dune = dune
         self.alerter = alerter
         self.ping_frequency = ping_frequency
+        self.options = options or RunOptions()
+        # Bytes of results held in memory by this monitor (default: budget's)
+        self.memory_limit = memory_limit
+        # Held for the duration of a run (e.g. scheduled and on demand runs)
+        self.lock = threading.Lock()
 
-    def run_loop(self) -> None:
+    def run_loop(self) -> RunReport:
         """
         Standard run-loop refreshing query, fetching results and alerting if necessary.
+        Returns the alert evaluated on the results.
         """
+        start = time.monotonic()
         query = self.query
+        query.refresh_parameters()
         log.info(f'Refreshing "{query.name}" query {query.result_url()}')
-        results = self.dune.refresh(query.query, self.ping_frequency)
-        alert = query.get_alert(results)
+        with PEAK_RSS.tracking():
+            results = self.options.budget.hold(self.fetch(), self.memory_limit)
+            alert = self.evaluate(results)
+            report = RunReport(
+                alert, results, time.monotonic() - start, PEAK_RSS.peak()
+            )
+        log.info(
+            f'"{query.name}" finished in {report.seconds:.1f}s '
+            f"with peak resident size {report.peak_rss // 2**20}MB",
+            extra={
+                "data": {
+                    "row_count": len(results),
+                    "spilled": isinstance(results, SpilledRows),
+                    "peak_rss": report.peak_rss,
+                    "budget_used": self.options.budget.used,
+                }
+            },
+        )
+        if self.options.history:
+            self.record_history(report)
+        return report
+
+    def evaluate(self, results: Sequence[DuneRecord]) -> Alert:
+        """Evaluates `results`, posting the alert (and dumping results) if necessary"""
+        alert = self.query.get_alert(results)
         if alert.level == AlertLevel.SLACK:
-            log.warning(f"alerting with {alert.message} on result set {results}")
+            log.warning(
+                f"alerting with {alert.message} on {len(results)} results",
+                extra={"data": summarize_results(results)},
+            )
+            if self.options.result_dump:
+                self.dump_results(results)
             self.alerter.post(alert.message)
         elif alert.level == AlertLevel.LOG:
             log.info(alert.message)
+        return alert
+
+    def record_history(self, report: RunReport) -> None:
+        """Appends `report` to the history (failures never affect alerting)"""
+        assert self.options.history is not None
+        try:
+            path = self.options.history.append(self.query, report)
+            log.debug(f"recorded {len(report.results)} results in {path}")
+        except Exception as err:  # pylint: disable=broad-except
+            log.exception(f"failed to record history of {self.query.name}: {err}")
+
+    def fetch(self) -> Sequence[DuneRecord]:
+        """Executes the query on Dune and returns its results"""
+        return self.dune.refresh(self.query.query, self.ping_frequency)
+
+    def dump_results(self, results: Sequence[DuneRecord]) -> None:
+        """Appends the full result set to the result dump (one record per line)"""
+        assert self.options.result_dump is not None
+        log.info(f"writing {len(results)} results to {self.options.result_dump}")
+        with open(self.options.result_dump, "a", encoding="utf-8") as dump_file:
+            for record in results:
+                dump_file.write(json.dumps(record, default=str) + "\n")
@@ -0,0 +1,199 @@
+"""
+Sharded execution of monitors across several worker processes (or hosts).
+
+Monitors are assigned to the live workers by consistent hashing of their key,
+so adding or losing a worker only moves the monitors of that worker.
+Coordination goes through a shared SQLite database holding
+ - worker heartbeats (a worker is live while its heartbeat is within `ttl`) and
+ - per tick monitor leases, guaranteeing each monitor runs once per tick.
+A crashed worker stops heart-beating: it drops out of the ring and
+its unfinished leases expire, so its shard fails over to the remaining workers.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Iterable
+
+log = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with `replicas` virtual nodes per node"""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        self._ring = sorted(
+            (_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    def node_for(self, key: str) -> str:
+        """Returns the node responsible for `key`"""
+        if not self._ring:
+            raise ValueError("Empty hash ring has no nodes")
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class LeaseStore:
+    """SQLite backed worker heartbeats and monitor leases"""
+
+    def __init__(self, path: str, ttl: float = 60.0):
+        self.path = path
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers "
+                "(worker TEXT PRIMARY KEY, heartbeat REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "monitor TEXT NOT NULL, tick INTEGER NOT NULL, worker TEXT NOT NULL, "
+                "expires REAL NOT NULL, done INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (monitor, tick))"
+            )
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        # Autocommit mode: transactions are opened explicitly where required.
+        # A fresh connection per operation keeps the store usable from any thread.
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def heartbeat(self, worker: str) -> None:
+        """Records `worker` as live and extends all of its unfinished leases"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers VALUES (?, ?) "
+                "ON CONFLICT(worker) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (worker, now),
+            )
+            conn.execute(
+                "UPDATE leases SET expires = ? WHERE worker = ? AND done = 0",
+                (now + self.ttl, worker),
+            )
+
+    def remove_worker(self, worker: str) -> None:
+        """Removes `worker` from the live set (i.e. on graceful shutdown)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+
+    def live_workers(self) -> list[str]:
+        """Workers whose last heartbeat is within `ttl`"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT worker FROM workers WHERE heartbeat > ? ORDER BY worker",
+                (time.time() - self.ttl,),
+            ).fetchall()
+        return [worker for (worker,) in rows]
+
+    def acquire(self, monitor: str, tick: int, worker: str) -> bool:
+        """
+        Attempts to lease `monitor` for `tick`. Succeeds when the monitor was
+        not yet leased for this tick, or the lease of another worker expired
+        before completion. Completed leases are never handed out again.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT worker, expires, done FROM leases WHERE monitor = ? AND tick = ?",
+                (monitor, tick),
+            ).fetchone()
+            if row is not None and (row[2] or (row[0] != worker and row[1] > now)):
+                conn.execute("ROLLBACK")
+                return False
+            if row is not None:
+                log.warning(f"taking over expired lease of {row[0]} on {monitor}")
+            conn.execute(
+                "INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?, 0)",
+                (monitor, tick, worker, now + self.ttl),
+            )
+            conn.execute("COMMIT")
+        return True
+
+    def complete(self, monitor: str, tick: int, worker: str) -> None:
+        """Marks the lease of `worker` on `monitor` for `tick` as done"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE leases SET done = 1 WHERE monitor = ? AND tick = ? AND worker = ?",
+                (monitor, tick, worker),
+            )
+
+    def prune(self, before_tick: int) -> None:
+        """Deletes leases of all ticks before `before_tick`"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE tick < ?", (before_tick,))
+
+
+def default_worker_id() -> str:
+    """Identifies the current process across hosts"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardCoordinator:
+    """
+    Decides which monitors the current worker runs.
+    Heartbeats are sent from a background thread, so that long-running
+    query executions do not make the worker appear dead.
+    """
+
+    def __init__(self, store: LeaseStore, worker: str | None = None):
+        self.store = store
+        self.worker = worker or default_worker_id()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Registers the worker and starts heart-beating"""
+        self.store.heartbeat(self.worker)
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops heart-beating and leaves the ring"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self.store.remove_worker(self.worker)
+
+    def _beat(self) -> None:
+        while not self._stopped.wait(self.store.ttl / 3):
+            try:
+                self.store.heartbeat(self.worker)
+            except sqlite3.Error as err:
+                log.error(f"heartbeat of {self.worker} failed: {err}")
+
+    def assignments(self, keys: Iterable[str]) -> dict[str, str]:
+        """Worker assigned to each of `keys` by the current ring"""
+        workers = self.store.live_workers()
+        if self.worker not in workers:
+            workers.append(self.worker)
+        ring = HashRing(workers)
+        return {key: ring.node_for(key) for key in keys}
+
+    def owned(self, keys: Iterable[str]) -> list[str]:
+        """The subset of `keys` assigned to this worker by the current ring"""
+        return [
+            key
+            for key, worker in self.assignments(keys).items()
+            if worker == self.worker
+        ]
+
+    def acquire(self, key: str, tick: int) -> bool:
+        """Leases monitor `key` for `tick`"""
+        return self.store.acquire(key, tick, self.worker)
+
+    def complete(self, key: str, tick: int) -> None:
+        """Marks monitor `key` as done for `tick`"""
+        self.store.complete(key, tick, self.worker)
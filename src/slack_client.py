@@ -4,7 +4,7 @@ Since channel is fixed at the beginning and nobody wants to see unfurled media
 otherwise be unnecessarily repeated.
 """
 import ssl
-import logging.config
+import logging
 import certifi
 
 from slack.errors import SlackApiError
@@ -13,7 +13,6 @@ from slack.web.client import WebClient
 from src.post.base import PostClient
 
 log = logging.getLogger(__name__)
-logging.config.fileConfig(fname="logging.conf", disable_existing_loggers=False)
 
 
 class BasicSlackClient(PostClient):
@@ -3,17 +3,23 @@ Main entry point to slackbot query monitoring
 """
 import argparse
 import os
+import sys
 
 import dotenv
 
 from dune_client.client import DuneClient
 
+from src.batch import BatchRunner, expand_paths, log_summary
+from src.daemon import run_daemon, run_workers
+from src.logger import configure_logging
+from src.memory import MemoryBudget, parse_size
 from src.post.base import PostClient
-from src.post.twitter import TwitterClient
+from src.post.factory import get_post_client
 from src.query_monitor.base import QueryBase
-from src.query_monitor.factory import load_config, AlertType
-from src.runner import QueryRunner
-from src.slack_client import BasicSlackClient
+from src.query_monitor.factory import load_config
+from src.resilience import ResilientDuneClient
+from src.history import HistoryStore
+from src.runner import QueryRunner, RunOptions
 
 
 def run_slackbot(
@@ -21,49 +27,175 @@ def run_slackbot(
     dune: DuneClient,
     alert_client: PostClient,
     ping_frequency: int,
+    *,
+    options: RunOptions | None = None,
+    memory_limit: int | None = None,
 ) -> None:
     """
     This is the main method of the program.
     Instantiate a query runner, and execute its run_loop
     """
-    query_runner = QueryRunner(query, dune, alert_client, ping_frequency)
+    query_runner = QueryRunner(
+        query,
+        dune,
+        alert_client,
+        ping_frequency,
+        options=options,
+        memory_limit=memory_limit,
+    )
     query_runner.run_loop()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Slackbot Configuration")
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--query-config",
         type=str,
-        help="YAML configuration file for a QueryMonitor object",
-        required=True,
+        nargs="+",
+        help="YAML configuration file(s) or glob patterns for QueryMonitor objects. "
+        "Multiple configurations are run concurrently as one batch",
+    )
+    source.add_argument(
+        "--config-dir",
+        type=str,
+        help="Directory of YAML configurations monitored in daemon mode",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        help="Seconds between runs of all monitors in daemon mode",
+        default=3600,
+    )
+    parser.add_argument(
+        "--lease-db",
+        type=str,
+        help="Shared SQLite file coordinating sharded daemon workers (on any host)",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of sharded daemon worker processes (requires --lease-db)",
+        default=1,
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Maximum number of concurrently running monitors in batch and daemon mode "
+        "(per worker)",
+        default=8,
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds after which a batch is ended, reporting unfinished monitors",
+        default=None,
+    )
+    parser.add_argument(
+        "--dump-results",
+        type=str,
+        help="File to which the full result set of alerting queries is appended",
+        default=None,
+    )
+    parser.add_argument(
+        "--history-dir",
+        type=str,
+        help="Directory of a local (columnar) history receiving all run results",
+        default=None,
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=parse_size,
+        help="Bytes of results held in memory by all monitors, e.g. 1GB "
+        "(results beyond are spilled to disk)",
+        default=None,
+    )
+    parser.add_argument(
+        "--monitor-memory-budget",
+        type=parse_size,
+        help="Default bytes of results held in memory by a single monitor, e.g. 256MB",
+        default=None,
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=str,
+        help="Directory of the temporary files of spilled results",
+        default=None,
+    )
+    parser.add_argument(
+        "--api-port",
+        type=int,
+        help="Port of the HTTP API listing and triggering monitors in daemon mode",
+        default=None,
+    )
+    parser.add_argument(
+        "--api-host",
+        type=str,
+        help="Interface the HTTP API is bound to (default: localhost only)",
+        default="127.0.0.1",
     )
     args = parser.parse_args()
+    configure_logging()
     dotenv.load_dotenv()
-    config = load_config(args.query_config)
-
-    alerter: PostClient
-    if config.alert_type == AlertType.SLACK:
-        alerter = BasicSlackClient(
-            token=os.environ["SLACK_TOKEN"],
-            # Use specified channel, or default to "global config"
-            channel=config.alert_channel or os.environ["SLACK_ALERT_CHANNEL"],
+    if args.workers > 1 and not args.lease_db:
+        parser.error("--workers requires --lease-db")
+    if args.config_dir and args.workers > 1:
+        run_workers(
+            workers=args.workers,
+            config_dir=args.config_dir,
+            interval=args.interval,
+            result_dump=args.dump_results,
+            lease_db=args.lease_db,
+            history_dir=args.history_dir,
+            api_port=args.api_port,
+            api_host=args.api_host,
+            memory_budget=args.memory_budget,
+            monitor_memory_budget=args.monitor_memory_budget,
+            spill_dir=args.spill_dir,
+            max_workers=args.max_workers,
         )
-    elif config.alert_type == AlertType.TWITTER:
-        alerter = TwitterClient(
-            credentials={
-                "consumer_key": os.environ["CONSUMER_KEY"],
-                "consumer_secret": os.environ["CONSUMER_SECRET"],
-                "access_token": os.environ["ACCESS_TOKEN"],
-                "access_token_secret": os.environ["ACCESS_TOKEN_SECRET"],
-            }
+    elif args.config_dir:
+        run_daemon(
+            config_dir=args.config_dir,
+            interval=args.interval,
+            result_dump=args.dump_results,
+            lease_db=args.lease_db,
+            history_dir=args.history_dir,
+            api_port=args.api_port,
+            api_host=args.api_host,
+            memory_budget=args.memory_budget,
+            monitor_memory_budget=args.monitor_memory_budget,
+            spill_dir=args.spill_dir,
+            max_workers=args.max_workers,
         )
     else:
-        raise ValueError(f"Invalid or unsupported AlertType {config.alert_type}")
+        run_options = RunOptions(
+            result_dump=args.dump_results,
+            history=HistoryStore(args.history_dir) if args.history_dir else None,
+            budget=MemoryBudget(
+                args.memory_budget, args.monitor_memory_budget, args.spill_dir
+            ),
+        )
+        config_paths = expand_paths(args.query_config)
+        if not config_paths:
+            parser.error("--query-config did not match any file")
+        if len(config_paths) > 1:
+            results = BatchRunner(
+                paths=config_paths,
+                dune=ResilientDuneClient(os.environ["DUNE_API_KEY"]),
+                max_workers=args.max_workers,
+                options=run_options,
+            ).run(deadline=args.deadline)
+            log_summary(results)
+            sys.exit(0 if all(result.ok for result in results.values()) else 1)
 
-    run_slackbot(
-        query=config.query,
-        dune=DuneClient(os.environ["DUNE_API_KEY"]),
-        alert_client=alerter,
-        ping_frequency=config.ping_frequency,
-    )
+        config = load_config(config_paths[0])
+        run_slackbot(
+            query=config.query,
+            dune=ResilientDuneClient(os.environ["DUNE_API_KEY"]),
+            alert_client=get_post_client(config.alert_type, config.alert_channel),
+            ping_frequency=config.ping_frequency,
+            options=run_options,
+            memory_limit=config.memory_limit,
+        )
@@ -0,0 +1,143 @@
+"""
+Alert message templates: `str.format` style templates, parsed (and validated)
+once at config load, optionally containing a bounded excerpt of the result rows.
+Rendered messages never exceed the length limit of their destination.
+"""
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Iterable, Mapping, Sequence
+
+from dune_client.types import DuneRecord
+
+EXCERPT = "excerpt"
+ELLIPSIS = "…"
+# Longest rendering of a single value within an excerpt
+MAX_VALUE_LENGTH = 64
+
+
+def truncate(text: str, max_length: int) -> str:
+    """Cuts `text` to at most `max_length` characters, marking the cut"""
+    if len(text) <= max_length:
+        return text
+    return text[: max(0, max_length - len(ELLIPSIS))] + ELLIPSIS
+
+
+def _sort_key(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("-inf")
+
+
+@dataclass
+class Excerpt:
+    """Top `rows` result rows by `order_by` (descending), showing `columns`"""
+
+    rows: int = 5
+    order_by: str | None = None
+    columns: list[str] | None = None
+
+    @classmethod
+    def from_cfg(cls, cfg: dict[str, Any]) -> Excerpt:
+        """Loads Excerpt from the `excerpt` section of a config"""
+        return cls(
+            rows=int(cfg.get("rows", 5)),
+            order_by=cfg.get("order_by"),
+            columns=cfg.get("columns"),
+        )
+
+    def select(self, results: Iterable[DuneRecord]) -> list[DuneRecord]:
+        """Top rows of `results`, selected in a single pass (without sorting all)"""
+        if self.order_by is None:
+            return [row for row, _ in zip(results, range(self.rows))]
+        column = self.order_by
+        return heapq.nlargest(
+            self.rows, results, key=lambda r: _sort_key(r.get(column))
+        )
+
+    def format(self, rows: Sequence[DuneRecord], total: int) -> str:
+        """One line per row, noting how many rows were left out"""
+        lines = [
+            ", ".join(
+                f"{column}={truncate(str(row.get(column)), MAX_VALUE_LENGTH)}"
+                for column in (self.columns or row.keys())
+            )
+            for row in rows
+        ]
+        if total > len(rows):
+            lines.append(f"(+{total - len(rows)} more)")
+        return "\n".join(lines)
+
+
+def _format_field(value: Any, spec: str | None, conversion: str | None) -> str:
+    if conversion == "r":
+        value = repr(value)
+    elif conversion in ("s", "a"):
+        value = str(value) if conversion == "s" else ascii(value)
+    elif conversion is not None:
+        raise ValueError(f"Unknown conversion !{conversion}")
+    return format(value, spec or "")
+
+
+class MessageTemplate:
+    """
+    Precompiled message template. Referenced fields must be among `fields`
+    (plus `excerpt`), and their format specs must apply to the field's
+    representative value in `fields`, otherwise construction fails with ValueError.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        fields: Mapping[str, Any],
+        max_length: int,
+        excerpt: Excerpt | None = None,
+    ):
+        samples = {**fields, EXCERPT: ""}
+        try:
+            self._parts = list(Formatter().parse(template))
+        except ValueError as err:
+            raise ValueError(f"Invalid message template {template!r}: {err}") from err
+        for _, name, spec, conversion in self._parts:
+            if name is None:
+                continue
+            if name not in samples or "{" in (spec or ""):
+                raise ValueError(
+                    f"Unsupported field {{{name}}} in message template, "
+                    f"available are {sorted(samples)}"
+                )
+            try:
+                _format_field(samples[name], spec, conversion)
+            except (ValueError, TypeError) as err:
+                raise ValueError(
+                    f"Invalid format of field {{{name}}} in message template: {err}"
+                ) from err
+        self.template = template
+        self.max_length = max_length
+        self.excerpt = excerpt or Excerpt()
+        self.uses_excerpt = any(name == EXCERPT for _, name, _, _ in self._parts)
+
+    def _format(self, context: dict[str, Any]) -> str:
+        pieces = []
+        for literal, name, spec, conversion in self._parts:
+            pieces.append(literal)
+            if name is not None:
+                pieces.append(_format_field(context[name], spec, conversion))
+        return "".join(pieces)
+
+    def render(self, context: dict[str, Any], results: Sequence[DuneRecord]) -> str:
+        """
+        Renders the template with `context` (and an excerpt of `results`).
+        Too long messages first lose excerpt rows, and are truncated as last resort.
+        """
+        rows = self.excerpt.select(results) if self.uses_excerpt else []
+        while True:
+            message = self._format(
+                {**context, EXCERPT: self.excerpt.format(rows, len(results))}
+            )
+            if len(message) <= self.max_length or not rows:
+                return truncate(message, self.max_length)
+            rows = rows[:-1]
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from unittest.mock import MagicMock, patch
+
+from src.api import MonitorAPI
+from src.daemon import MonitorDaemon
+from src.query_monitor.loader import ConfigLoader
+from src.sharding import HashRing, LeaseStore, ShardCoordinator
+from tests.file import filepath
+
+
+class TestMonitorAPI(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        shutil.copy(filepath("no-params.yaml"), self.dir)
+        self.dune = MagicMock()
+        self.dune.refresh.return_value = [{"x": 1}, {"x": 2}]
+        with patch("src.post.factory.get_post_client") as mock_post_client:
+            self.alerter = mock_post_client.return_value
+            self.daemon = MonitorDaemon(ConfigLoader(self.dir), self.dune, interval=1)
+            self.daemon.reload()
+        self.api = MonitorAPI(self.daemon, "127.0.0.1", 0)
+        self.api.start()
+        self.url = "http://127.0.0.1:{}".format(self.api.server.server_address[1])
+
+    def tearDown(self) -> None:
+        self.api.stop()
+        shutil.rmtree(self.dir)
+
+    def request(self, path: str, method: str = "GET") -> tuple[int, object]:
+        try:
+            with urlopen(Request(self.url + path, method=method), timeout=5) as resp:
+                return resp.status, json.load(resp)
+        except HTTPError as err:
+            return err.code, json.load(err)
+
+    def test_list_monitors(self):
+        status, body = self.request("/monitors")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body,
+            [
+                {
+                    "key": "no-params.yaml",
+                    "name": "No Parameters",
+                    "query_id": 123,
+                    "url": "https://dune.com/queries/123",
+                }
+            ],
+        )
+
+    def test_metrics(self):
+        status, body = self.request("/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["monitors"], 1)
+        self.assertEqual(body["memory"], {"limit": None, "used": 0, "peak": 0})
+
+    def test_run_sync(self):
+        status, body = self.request("/monitors/no-params.yaml/run", "POST")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["monitor"], "no-params.yaml")
+        self.assertEqual(body["alert"]["level"], "SLACK")
+        self.assertEqual(body["row_count"], 2)
+        self.alerter.post.assert_called_once_with(body["alert"]["message"])
+
+    def test_run_async(self):
+        status, body = self.request("/monitors/no-params.yaml/run?async=1", "POST")
+        self.assertEqual(status, 202)
+        job = f"/jobs/{body['job_id']}"
+        for _ in range(50):
+            status, body = self.request(job)
+            if body["status"] != "running":
+                break
+            time.sleep(0.05)
+        self.assertEqual(body["status"], "done")
+        self.assertEqual(body["result"]["row_count"], 2)
+
+    @patch("src.api.MAX_JOBS", 1)
+    def test_evicted_jobs(self):
+        first = self.api.submit("no-params.yaml")
+        second = self.api.submit("no-params.yaml")
+        self.assertIsNone(self.api.job(first))
+        self.assertEqual(self.request(f"/jobs/{first}")[0], 404)
+        self.assertEqual(self.request(f"/jobs/{second}")[0], 200)
+
+    def test_sharded(self):
+        store = LeaseStore(os.path.join(self.dir, "leases.db"))
+        for worker in ["w1", "w2"]:
+            store.heartbeat(worker)
+        owner = HashRing(["w1", "w2"]).node_for("no-params.yaml")
+        other = "w2" if owner == "w1" else "w1"
+
+        self.daemon.shard = ShardCoordinator(store, worker=other)
+        self.assertEqual(self.request("/monitors"), (200, []))
+        status, body = self.request("/monitors/no-params.yaml/run", "POST")
+        self.assertEqual((status, body["owner"]), (409, owner))
+        self.dune.refresh.assert_not_called()
+
+        self.daemon.shard = ShardCoordinator(store, worker=owner)
+        self.assertEqual(len(self.request("/monitors")[1]), 1)
+        self.assertEqual(self.request("/monitors/no-params.yaml/run", "POST")[0], 200)
+
+    def test_failures(self):
+        self.assertEqual(self.request("/monitors/unknown/run", "POST")[0], 404)
+        self.assertEqual(self.request("/jobs/unknown")[0], 404)
+        self.dune.refresh.side_effect = RuntimeError("dune down")
+        with self.assertLogs("src.api", level="ERROR"):
+            status, body = self.request("/monitors/no-params.yaml/run", "POST")
+        self.assertEqual((status, body), (500, {"error": "dune down"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.batch import BatchRunner, expand_paths
+from tests.file import filepath, TEST_CONFIG_PATH
+
+
+class TestBatch(unittest.TestCase):
+    def test_expand_paths(self):
+        paths = expand_paths(
+            [filepath("counter.yaml"), str(TEST_CONFIG_PATH / "*-window.yaml")]
+        )
+        self.assertEqual(paths, [filepath("counter.yaml"), filepath("day-window.yaml")])
+        # Duplicates are dropped
+        self.assertEqual(
+            expand_paths([filepath("counter.yaml"), filepath("counter.yaml")]),
+            [filepath("counter.yaml")],
+        )
+
+    @patch("src.post.factory.get_post_client")
+    def test_runs_concurrently(self, mock_post_client):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def refresh(*_):
+            # Times out, unless both valid monitors run at the same time.
+            barrier.wait()
+            return []
+
+        dune = MagicMock()
+        dune.refresh.side_effect = refresh
+        paths = [filepath(name) for name in ["no-params.yaml", "with-params.yaml"]]
+        results = BatchRunner(
+            paths + [filepath("does-not-exist.yaml")], dune, max_workers=3
+        ).run()
+        self.assertEqual([r.status for r in results.values()], ["log", "log", "failed"])
+        # Shared destination, single post client.
+        mock_post_client.assert_called_once()
+
+    @patch("src.post.factory.get_post_client")
+    def test_deadline(self, _):
+        dune = MagicMock()
+        dune.refresh.side_effect = lambda *_: time.sleep(1) or []
+        paths = [filepath("no-params.yaml"), filepath("with-params.yaml")]
+        start = time.monotonic()
+        results = BatchRunner(paths, dune, max_workers=1).run(deadline=0.5)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(
+            [r.status for r in results.values()], ["timed out", "timed out"]
+        )
+        self.assertFalse(any(r.ok for r in results.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import threading
+import unittest
+
+from dune_client.types import QueryParameter
+
+from src.alert import Alert, AlertLevel
+from src.dag import DagExecutor, DependencyGraph
+from src.query_monitor.factory import Dependency, load_config, parse_config
+from src.resilience import CircuitOpenError
+from src.runner import RunReport
+from tests.file import filepath
+
+
+def config(name, *dependencies):
+    return parse_config(
+        {
+            "name": name,
+            "id": 1,
+            "depends_on": [{"monitor": dep, "level": "log"} for dep in dependencies],
+        }
+    )
+
+
+class TestDependency(unittest.TestCase):
+    def test_load(self):
+        dependency = load_config(filepath("dependent.yaml")).dependencies[0]
+        self.assertEqual(dependency.monitor, "Sentinel")
+        self.assertEqual(dependency.level, AlertLevel.SLACK)
+        self.assertTrue(dependency.is_satisfied(AlertLevel.SLACK))
+        self.assertFalse(dependency.is_satisfied(AlertLevel.LOG))
+        self.assertEqual(
+            dependency.query_parameters([{"token": "0xabc", "amount": 10}]),
+            [
+                QueryParameter.text_type("Token", "0xabc"),
+                QueryParameter.number_type("MinAmount", 10),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            dependency.query_parameters([])
+        self.assertEqual(Dependency("Sentinel").query_parameters([]), [])
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_errors(self):
+        graph = DependencyGraph(
+            {
+                "a": config("A", "C"),
+                "c": config("C", "A"),
+                "d": config("D", "A"),
+                "e": config("E", "Unknown"),
+                "f": config("F"),
+            }
+        )
+        self.assertEqual(
+            graph.errors,
+            {
+                "a": "dependency cycle",
+                "c": "dependency cycle",
+                "d": "dependency cycle",
+                "e": "dependency Unknown matches 0 monitors",
+            },
+        )
+
+    def test_components(self):
+        graph = DependencyGraph(
+            {
+                "a": config("A"),
+                "b": config("B", "A"),
+                "c": config("C"),
+                "d": config("D", "C", "B"),
+                "e": config("E"),
+            }
+        )
+        self.assertEqual(
+            graph.components(), {"a": "a", "b": "a", "c": "a", "d": "a", "e": "e"}
+        )
+
+
+class TestDagExecutor(unittest.TestCase):
+    def test_conditional_execution(self):
+        configs = {
+            "sentinel": parse_config({"name": "Sentinel", "id": 1}),
+            "quiet": parse_config({"name": "Quiet", "id": 2}),
+            "drill": load_config(filepath("dependent.yaml")),
+            "skipped": parse_config(
+                {"name": "Skipped", "id": 4, "depends_on": [{"monitor": "Quiet"}]}
+            ),
+            "transitive": config("Transitive", "Skipped"),
+        }
+        # Independent branches must run in parallel.
+        barrier = threading.Barrier(2, timeout=5)
+        runs = {}
+
+        def run(key, overrides):
+            runs[key] = overrides
+            if key == "sentinel":
+                barrier.wait()
+                return RunReport(Alert.slack("!"), [{"token": "0x1", "amount": 2}], 1)
+            if key == "quiet":
+                barrier.wait()
+            return RunReport(Alert.log("ok"), [], 1)
+
+        results = DagExecutor(DependencyGraph(configs), run, max_workers=4).run()
+        self.assertEqual(
+            {key: result.status for key, result in results.items()},
+            {
+                "sentinel": "slack",
+                "quiet": "log",
+                "drill": "log",
+                "skipped": "skipped",
+                "transitive": "skipped",
+            },
+        )
+        self.assertEqual(set(runs), {"sentinel", "quiet", "drill"})
+        self.assertEqual(
+            runs["drill"],
+            [
+                QueryParameter.text_type("Token", "0x1"),
+                QueryParameter.number_type("MinAmount", 2),
+            ],
+        )
+
+    def test_failure_skips_dependents(self):
+        def run(key, _):
+            raise RuntimeError(key)
+
+        graph = DependencyGraph({"a": config("A"), "b": config("B", "A")})
+        results = DagExecutor(graph, run, max_workers=2).run()
+        self.assertEqual(results["a"].status, "failed")
+        self.assertEqual(results["b"].status, "skipped")
+
+    def test_open_circuit_defers(self):
+        def run(key, _):
+            raise CircuitOpenError(key)
+
+        graph = DependencyGraph({"a": config("A"), "b": config("B", "A")})
+        with self.assertLogs("src.dag", level="WARNING"):
+            results = DagExecutor(graph, run, max_workers=2).run()
+        self.assertEqual([r.status for r in results.values()], ["deferred"] * 2)
+        self.assertFalse(results["a"].ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import MagicMock
+
+from dune_client.types import QueryParameter
+
+from src.fan_in import FanInRunner, build_groups
+from src.memory import HeldRows, MemoryBudget, SpilledRows
+from src.query_monitor.factory import load_config, validate_config
+from src.runner import RunOptions
+from tests.file import filepath
+
+
+def member(solver: str, min_value: int = 10):
+    config = load_config(filepath("fan-in.yaml"))
+    config.query.override_parameters(
+        [
+            QueryParameter.text_type("Solver", solver),
+            QueryParameter.number_type("MinValue", min_value),
+        ]
+    )
+    return config
+
+
+class TestFanIn(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dune = MagicMock()
+        self.dune.refresh.return_value = [
+            {"solver": "a", "tx": 1},
+            {"solver": "b", "tx": 2},
+            {"solver": "a", "tx": 3},
+        ]
+        self.configs = {
+            "a": member("a"),
+            "b": member("b"),
+            "c": member("c"),
+            "other": member("d", min_value=5),
+        }
+
+    def test_grouping(self):
+        groups = build_groups(self.configs, self.dune)
+        self.assertEqual(sorted(groups), ["a", "b", "c"])
+        self.assertIs(groups["a"], groups["c"])
+
+        query = groups["a"].query()
+        self.assertEqual(query.query_id, 2)
+        self.assertEqual(
+            query.parameters(),
+            [
+                QueryParameter.number_type("MinValue", 10),
+                QueryParameter.text_type("Solvers", "a,b,c"),
+            ],
+        )
+
+    def test_single_execution(self):
+        groups = build_groups(self.configs, self.dune)
+        alerter = MagicMock()
+        reports = {
+            key: FanInRunner(self.configs[key].query, groups[key], alerter).run_loop()
+            for key in ["a", "b", "c"]
+        }
+        self.dune.refresh.assert_called_once()
+        self.assertEqual([row["tx"] for row in reports["a"].results], [1, 3])
+        self.assertEqual([row["tx"] for row in reports["b"].results], [2])
+        self.assertEqual(reports["c"].results, [])
+        # Threshold of 1 result: only monitor a alerts.
+        alerter.post.assert_called_once()
+
+    def test_member_memory_limits(self):
+        self.configs["a"].memory_limit = 0
+        budget = MemoryBudget()
+        groups = build_groups(self.configs, self.dune, budget)
+        rows_a, rows_b = groups["a"].rows_for("a"), groups["b"].rows_for("b")
+        self.assertIsInstance(rows_a, SpilledRows)
+        self.assertEqual([row["tx"] for row in rows_a], [1, 3])
+        self.assertIsInstance(rows_b, HeldRows)
+        # Group rows are accounted once, not again by the member's run
+        used = budget.used
+        self.assertGreater(used, 0)
+        report = FanInRunner(
+            self.configs["b"].query, groups["b"], MagicMock(), RunOptions(budget=budget)
+        ).run_loop()
+        self.assertIs(report.results, rows_b)
+        self.assertEqual(budget.used, used)
+
+    def test_failed_execution_shared(self):
+        groups = build_groups(self.configs, self.dune)
+        self.dune.refresh.side_effect = RuntimeError("dune down")
+        for key in ["a", "b", "c"]:
+            with self.assertRaises(RuntimeError):
+                FanInRunner(
+                    self.configs[key].query, groups[key], MagicMock()
+                ).run_loop()
+        self.dune.refresh.assert_called_once()
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            validate_config(
+                {
+                    "name": "Missing Parameter",
+                    "id": 1,
+                    "fan_in": {
+                        "query_id": 2,
+                        "key_column": "solver",
+                        "parameter": "Solver",
+                        "batch_parameter": "Solvers",
+                    },
+                }
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
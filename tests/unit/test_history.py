@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from dune_client.query import Query
+from dune_client.types import QueryParameter
+
+from src.alert import Alert
+from src.history import EXECUTED_AT, MONITOR, HistoryStore
+from src.query_monitor.result_threshold import ResultThresholdQuery
+from src.runner import QueryRunner, RunOptions, RunReport
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+        self.store = HistoryStore(self.root)
+        self.monitor = ResultThresholdQuery(Query(name="Monitor", query_id=7))
+        self.day = datetime(2022, 3, 10, 12, tzinfo=timezone.utc)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def test_append_and_read(self):
+        first = RunReport(Alert.slack("!"), [{"tx": 1, "value": 1.5}], 2.0)
+        # Mixed types and changing columns across runs
+        second = RunReport(
+            Alert.log("ok"), [{"tx": "0xab", "solver": "a"}, {"tx": 2}], 1.0
+        )
+        path = self.store.append(self.monitor, first, self.day)
+        self.assertIn("query_id=7/date=2022-03-10", path)
+        self.store.append(self.monitor, second, self.day + timedelta(hours=1))
+        self.store.append(self.monitor, second, self.day + timedelta(days=1))
+
+        records = self.store.records(7, self.day.date())
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0][EXECUTED_AT], self.day)
+        self.assertEqual(records[0]["value"], 1.5)
+        self.assertEqual(records[1]["tx"], "0xab")
+        self.assertEqual(records[2]["tx"], "2")
+        self.assertIsNone(records[2]["solver"])
+
+        self.assertEqual(
+            len(self.store.read(7, self.day.date(), self.day.date() + timedelta(1))),
+            5,
+        )
+        runs = self.store.runs(7, self.day.date())
+        self.assertEqual(
+            [(run["alert_level"], run["row_count"]) for run in runs],
+            [("SLACK", "1"), ("LOG", "2")],
+        )
+        self.assertEqual(runs[0]["monitor"], "Monitor")
+
+    def test_conflicting_types(self):
+        for hour, rows in enumerate(
+            [[{"x": [1, 2], "n": 1}], [{"x": "a", "n": 2.5}], [{"x": None, "n": None}]]
+        ):
+            report = RunReport(Alert.log(""), rows, 1.0)
+            self.store.append(self.monitor, report, self.day + timedelta(hours=hour))
+        records = self.store.records(7, self.day.date())
+        self.assertEqual([r["x"] for r in records], ["[1, 2]", "a", None])
+        # Numbers are widened, not turned into text
+        self.assertEqual([r["n"] for r in records], [1.0, 2.5, None])
+
+    def test_monitors_sharing_a_query(self):
+        solvers = [
+            ResultThresholdQuery(
+                Query(
+                    name="Monitor",
+                    query_id=7,
+                    params=[QueryParameter.text_type("Solver", solver)],
+                )
+            )
+            for solver in ["a", "b"]
+        ]
+        self.assertNotEqual(solvers[0].monitor_id, solvers[1].monitor_id)
+        for solver, monitor in zip(["a", "b"], solvers):
+            report = RunReport(Alert.log(""), [{"solver": solver}], 1.0)
+            self.store.append(monitor, report, self.day)
+
+        records = self.store.records(7, self.day.date())
+        self.assertEqual({r[MONITOR] for r in records}, {m.monitor_id for m in solvers})
+        mine = self.store.records(7, self.day.date(), monitor=solvers[1].monitor_id)
+        self.assertEqual([r["solver"] for r in mine], ["b"])
+        runs = self.store.runs(7, self.day.date(), monitor=solvers[0].monitor_id)
+        self.assertEqual([run["row_count"] for run in runs], ["1"])
+        # Names select all monitors of that name
+        self.assertEqual(len(self.store.read(7, self.day.date(), monitor="Monitor")), 2)
+        self.assertEqual(self.store.records(7, self.day.date(), monitor="Other"), [])
+
+    def test_segments_ordered_within_a_second(self):
+        for micros in [900000, 5, 500]:
+            report = RunReport(Alert.log(""), [{"us": micros}], 1.0)
+            executed_at = self.day.replace(microsecond=micros)
+            self.store.append(self.monitor, report, executed_at)
+        records = self.store.records(7, self.day.date())
+        self.assertEqual([r["us"] for r in records], [5, 500, 900000])
+
+    def test_empty(self):
+        self.store.append(self.monitor, RunReport(Alert.log(""), [], 1.0), self.day)
+        self.assertEqual(self.store.records(7, self.day.date()), [])
+        self.assertEqual(len(self.store.runs(7, self.day.date())), 1)
+        self.assertEqual(self.store.records(8, self.day.date()), [])
+
+    def test_runner_records_history(self):
+        dune = MagicMock()
+        dune.refresh.return_value = [{"tx": 1}]
+        runner = QueryRunner(
+            self.monitor, dune, MagicMock(), 1, options=RunOptions(history=self.store)
+        )
+        runner.run_loop()
+        today = datetime.now(timezone.utc).date()
+        self.assertEqual(self.store.records(7, today)[0]["tx"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
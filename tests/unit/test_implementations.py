@@ -1,6 +1,7 @@
 import datetime
 import os
 import unittest
+from unittest.mock import patch
 
 from dune_client.query import Query
 from dune_client.types import QueryParameter
@@ -43,6 +44,45 @@ class TestQueryMonitor(unittest.TestCase):
             self.query_params + self.windowed_monitor.window.as_query_parameters(),
         )
 
+    def test_refresh_parameters(self):
+        monitor = WindowedQueryMonitor(
+            query=Query(name="Rolling", query_id=0, params=self.query_params),
+            window=TimeWindow(start=self.date),
+            window_cfg={"offset": 3, "length": 1},
+        )
+        next_window = TimeWindow(start=self.date).next()
+        with patch.object(TimeWindow, "from_cfg", return_value=next_window):
+            for _ in range(3):
+                monitor.refresh_parameters()
+        self.assertEqual(monitor.window, next_window)
+        self.assertEqual(
+            monitor.parameters(),
+            self.query_params + next_window.as_query_parameters(),
+        )
+
+        # Fixed windows (without config) are left untouched
+        window = self.windowed_monitor.window
+        self.windowed_monitor.refresh_parameters()
+        self.assertEqual(self.windowed_monitor.window, window)
+        self.assertEqual(len(self.windowed_monitor.parameters()), 6)
+
+        left_bounded = load_config(filepath("left-bounded.yaml")).query
+        left_bounded.refresh_parameters()
+        self.assertEqual(len(left_bounded.parameters()), 2)
+
+    def test_override_parameters(self):
+        override = QueryParameter.text_type("Text", "from upstream")
+        extra = QueryParameter.number_type("Extra", 1)
+        self.windowed_monitor.override_parameters([override, extra])
+        params = self.windowed_monitor.parameters()
+        self.assertEqual(params[1], override)
+        self.assertEqual(params[-1], extra)
+        # Overrides survive window refreshes and don't accumulate
+        self.windowed_monitor.override_parameters([override, extra])
+        self.windowed_monitor._set_window(self.windowed_monitor.window.next())
+        self.assertEqual(len(self.windowed_monitor.parameters()), 7)
+        self.assertEqual(self.windowed_monitor.parameters()[1], override)
+
     def test_alert_message(self):
         self.assertEqual(
             self.monitor.get_alert([{}]),
@@ -1,7 +1,7 @@
 import os
 import unittest
 
-from src.query_monitor.factory import load_config
+from src.query_monitor.factory import load_config, parse_config, validate_config
 from tests.file import filepath
 
 
@@ -24,6 +24,35 @@ class TestConfigLoading(unittest.TestCase):
         config = load_config(filepath("counter.yaml"))
         self.assertEqual(config.ping_frequency, 20)
 
+    def test_validate_config(self):
+        validate_config({"name": "Valid", "id": 1, "window": "yesterday"})
+        with self.assertRaises(ValueError) as err:
+            validate_config({"name": 1, "threshold": "3", "typo": 1})
+        message = str(err.exception)
+        self.assertIn("missing required key 'id'", message)
+        self.assertIn("'name' must be of type str", message)
+        self.assertIn("'threshold' must be of type int", message)
+        self.assertIn("unknown key 'typo'", message)
+
+        with self.assertRaises(ValueError):
+            validate_config(["not", "a", "mapping"])
+        with self.assertRaises(ValueError):
+            validate_config({"name": "x", "id": 1, "parameters": [{"key": "k"}]})
+        for dependency in [
+            {"monitor": "A", "level": 1},
+            {"monitor": "A", "parameters": "key"},
+            {"monitor": "A", "parameters": ["key"]},
+        ]:
+            with self.assertRaises(ValueError):
+                validate_config({"name": "x", "id": 1, "depends_on": [dependency]})
+
+    def test_memory_limit(self):
+        self.assertIsNone(load_config(filepath("counter.yaml")).memory_limit)
+        config = parse_config({"name": "Big", "id": 1, "memory_limit": "64MB"})
+        self.assertEqual(config.memory_limit, 64 * 2**20)
+        with self.assertRaises(ValueError):
+            validate_config({"name": "Big", "id": 1, "memory_limit": "a lot"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.daemon import MonitorDaemon
+from src.query_monitor.loader import ConfigLoader
+from tests.file import filepath
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        for name in ["counter.yaml", "no-params.yaml"]:
+            shutil.copy(filepath(name), self.dir)
+        self.counter = os.path.join(self.dir, "counter.yaml")
+        self.no_params = os.path.join(self.dir, "no-params.yaml")
+        self.loader = ConfigLoader(self.dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def touch(self, path: str, content: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        # Guarantee a distinct mtime regardless of filesystem resolution.
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_load_all_cached(self):
+        configs = self.loader.load_all()
+        self.assertEqual(list(configs), [self.counter, self.no_params])
+        with patch("src.query_monitor.loader.load_config") as mock_load:
+            self.assertFalse(self.loader.poll())
+            mock_load.assert_not_called()
+        self.assertIs(self.loader.load_all()[self.counter], configs[self.counter])
+
+    def test_poll_changes(self):
+        self.loader.poll()
+        self.touch(self.counter, "name: Renamed\nid: 1\n")
+        os.remove(self.no_params)
+        new_path = os.path.join(self.dir, "new.yml")
+        self.touch(new_path, "name: New\nid: 2\n")
+
+        changes = self.loader.poll()
+        self.assertEqual(sorted(changes.updated), [self.counter, new_path])
+        self.assertEqual(changes.updated[self.counter].query.name, "Renamed")
+        self.assertEqual(changes.removed, [self.no_params])
+
+    def test_invalid_config_skipped(self):
+        self.touch(os.path.join(self.dir, "bad.yaml"), "name: Missing ID\n")
+        with self.assertLogs("src.query_monitor.loader", level="ERROR"):
+            configs = self.loader.load_all()
+        self.assertEqual(list(configs), [self.counter, self.no_params])
+        # Unchanged invalid files are not parsed (nor logged) again.
+        self.assertFalse(self.loader.poll())
+
+    def test_unexpected_errors_skipped(self):
+        # Passes validation, but fails constructing the window
+        bad = os.path.join(self.dir, "bad.yaml")
+        self.touch(bad, "name: Bad\nid: 1\nwindow: {offset: one, length: 2}\n")
+        with self.assertLogs("src.query_monitor.loader", level="ERROR"):
+            configs = self.loader.load_all()
+        self.assertEqual(list(configs), [self.counter, self.no_params])
+
+
+class TestMonitorDaemon(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        for name in ["counter.yaml", "no-params.yaml"]:
+            shutil.copy(filepath(name), self.dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    @patch("src.post.factory.get_post_client")
+    def test_hot_swap(self, mock_post_client):
+        daemon = MonitorDaemon(ConfigLoader(self.dir), MagicMock(), interval=1)
+        daemon.reload()
+        runners = dict(daemon.runners)
+        self.assertEqual(len(runners), 2)
+        # Both configs share the same slack destination
+        mock_post_client.assert_called_once()
+
+        counter = os.path.join(self.dir, "counter.yaml")
+        with open(counter, "a", encoding="utf-8") as file:
+            file.write("threshold: 3\n")
+        stat = os.stat(counter)
+        os.utime(counter, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        daemon.reload()
+        no_params = os.path.join(self.dir, "no-params.yaml")
+        self.assertIs(daemon.runners[no_params], runners[no_params])
+        self.assertIsNot(daemon.runners[counter], runners[counter])
+
+    @patch("src.post.factory.get_post_client")
+    def test_tick_isolates_failures(self, _):
+        dune = MagicMock()
+        dune.refresh.side_effect = RuntimeError("dune down")
+        daemon = MonitorDaemon(ConfigLoader(self.dir), dune, interval=1)
+        with self.assertLogs("src.dag", level="ERROR") as logs:
+            daemon.tick()
+        self.assertEqual(len(logs.records), 2)
+
+    @patch("src.post.factory.get_post_client")
+    def test_tick_runs_independent_monitors_concurrently(self, _):
+        # Both monitors must be running at the same time to pass the barrier.
+        barrier = threading.Barrier(2, timeout=5)
+        dune = MagicMock()
+        dune.refresh.side_effect = lambda *_, **__: barrier.wait()
+        daemon = MonitorDaemon(ConfigLoader(self.dir), dune, interval=1, max_workers=2)
+        with self.assertLogs("src.dag", level="ERROR") as logs:
+            daemon.tick()
+        # Both runs fail (on the mocked results), but neither on a broken barrier.
+        self.assertEqual(len(logs.records), 2)
+        self.assertFalse(barrier.broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
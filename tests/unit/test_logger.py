@@ -0,0 +1,45 @@
+import json
+import logging
+import queue
+import sys
+import unittest
+
+from src.logger import JsonFormatter, StructuredQueueHandler
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_format(self):
+        record = logging.LogRecord(
+            "src.test", logging.WARNING, __file__, 1, "hello %s", ("world",), None
+        )
+        record.data = {"row_count": 1}
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "hello world")
+        self.assertEqual(entry["level"], "WARNING")
+        self.assertEqual(entry["name"], "src.test")
+        self.assertEqual(entry["data"], {"row_count": 1})
+
+    def test_format_without_data(self):
+        record = logging.LogRecord(
+            "src.test", logging.INFO, __file__, 1, "plain", None, None
+        )
+        self.assertNotIn("data", json.loads(JsonFormatter().format(record)))
+
+    def test_format_enqueued_exception(self):
+        try:
+            raise RuntimeError("dune down")
+        except RuntimeError:
+            record = logging.LogRecord(
+                "src.test", logging.ERROR, __file__, 1, "failed %s", ("run",), True
+            )
+            record.exc_info = sys.exc_info()
+        prepared = StructuredQueueHandler(queue.SimpleQueue()).prepare(record)
+        entry = json.loads(JsonFormatter().format(prepared))
+        self.assertEqual(entry["message"], "failed run")
+        self.assertIn("RuntimeError: dune down", entry["exc_info"])
+        # Plain formatters still render the traceback
+        self.assertIn("dune down", logging.Formatter().format(prepared))
+
+
+if __name__ == "__main__":
+    unittest.main()
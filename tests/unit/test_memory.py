@@ -0,0 +1,87 @@
+import gc
+import unittest
+from unittest.mock import MagicMock
+
+from dune_client.query import Query
+
+from src.memory import (
+    HeldRows,
+    MemoryBudget,
+    PeakTracker,
+    SpilledRows,
+    estimate_size,
+    parse_size,
+)
+from src.query_monitor.result_threshold import ResultThresholdQuery
+from src.runner import QueryRunner, RunOptions
+
+
+class TestMemory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows = [{"block": i, "hash": f"0x{i:064x}"} for i in range(1000)]
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size(1024), 1024)
+        self.assertEqual(parse_size("512KB"), 512 * 2**10)
+        self.assertEqual(parse_size("64mb"), 64 * 2**20)
+        self.assertEqual(parse_size("1 GB"), 2**30)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_spilled_rows(self):
+        spilled = SpilledRows(self.rows)
+        self.assertEqual(len(spilled), 1000)
+        self.assertEqual(spilled[0], self.rows[0])
+        self.assertEqual(spilled[-1], self.rows[-1])
+        self.assertEqual(spilled[10:13], self.rows[10:13])
+        self.assertEqual(list(spilled), self.rows)
+        with self.assertRaises(IndexError):
+            _ = spilled[1000]
+
+        empty = SpilledRows([])
+        self.assertEqual((len(empty), list(empty), empty[:5]), (0, [], []))
+
+    def test_monitor_limit(self):
+        budget = MemoryBudget(monitor_limit=estimate_size(self.rows) - 1)
+        self.assertIsInstance(budget.hold(self.rows), SpilledRows)
+        self.assertIsInstance(budget.hold(self.rows, limit=2**30), HeldRows)
+
+    def test_global_budget_released(self):
+        budget = MemoryBudget(limit=int(estimate_size(self.rows) * 1.5))
+        held = budget.hold(self.rows)
+        self.assertIsInstance(held, HeldRows)
+        self.assertIsInstance(budget.hold(self.rows), SpilledRows)
+
+        del held
+        gc.collect()
+        self.assertEqual(budget.used, 0)
+        self.assertIsInstance(budget.hold(self.rows), HeldRows)
+        self.assertEqual(budget.peak, estimate_size(self.rows))
+
+    def test_peak_tracker(self):
+        tracker = PeakTracker()
+        with tracker.tracking():
+            before = tracker.peak()
+            # Freed right away, i.e. only visible in the high-water mark
+            block = b"x" * 64 * 2**20
+            del block
+            peak = tracker.peak()
+        self.assertGreaterEqual(peak - before, 60 * 2**20)
+
+    def test_runner_spills(self):
+        dune = MagicMock()
+        dune.refresh.return_value = self.rows
+        monitor = ResultThresholdQuery(Query(name="Monitor", query_id=0), 999)
+        runner = QueryRunner(
+            monitor, dune, MagicMock(), 1, options=RunOptions(budget=MemoryBudget(0))
+        )
+        with self.assertLogs("src.runner", level="INFO") as logs:
+            report = runner.run_loop()
+        self.assertIsInstance(report.results, SpilledRows)
+        self.assertEqual(report.alert.message, monitor.get_alert(self.rows).message)
+        self.assertGreater(report.peak_rss, 0)
+        self.assertTrue(logs.records[-1].data["spilled"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from src.resilience import (
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitOpenError,
+    ResilientDuneClient,
+    RetryPolicy,
+    endpoint_name,
+)
+
+URL = "https://api.dune.com/api/v1/execution/01ABC/status"
+
+
+def response(status: int, body=None):
+    resp = MagicMock(status_code=status)
+    resp.json.return_value = body or {}
+    return resp
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_backoff(self):
+        policy = RetryPolicy(base=1.0, cap=5.0)
+        for attempt in range(6):
+            self.assertLessEqual(policy.backoff(attempt), min(5.0, 2**attempt))
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name(URL), "status")
+        self.assertEqual(endpoint_name(URL.replace("status", "results")), "results")
+
+    def test_state_transitions(self):
+        breaker = CircuitBreaker("status", threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.allow()
+        with self.assertLogs("src.resilience", level="WARNING"):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+        # A single trial call once the timeout passed, failing re-opens.
+        breaker.reset_timeout = 0
+        breaker.allow()
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        with self.assertLogs("src.resilience", level="WARNING"):
+            breaker.record_failure()
+
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.snapshot(), {"state": "closed", "failures": 0})
+
+
+@patch("src.resilience.time.sleep")
+@patch("src.resilience.requests.request")
+class TestResilientDuneClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.breakers = CircuitBreakers(threshold=3)
+        self.dune = ResilientDuneClient("key", breakers=self.breakers)
+
+    def test_retries_transient_failures(self, mock_request, mock_sleep):
+        mock_request.side_effect = [
+            requests.Timeout("slow"),
+            response(503),
+            response(200, {"state": "QUERY_STATE_COMPLETED"}),
+        ]
+        with self.assertLogs("src.resilience", level="WARNING"):
+            self.assertEqual(self.dune._get(URL), {"state": "QUERY_STATE_COMPLETED"})
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(self.breakers.snapshot()["status"]["state"], "closed")
+
+    def test_client_errors_not_retried(self, mock_request, _):
+        mock_request.return_value = response(400, {"error": "bad parameters"})
+        self.assertEqual(self.dune._post(URL, None), {"error": "bad parameters"})
+        mock_request.assert_called_once()
+
+    def test_open_circuit_fails_fast(self, mock_request, _):
+        mock_request.return_value = response(502)
+        with self.assertLogs("src.resilience", level="WARNING"):
+            with self.assertRaises(CircuitOpenError):
+                self.dune._get(URL)
+        self.assertEqual(mock_request.call_count, 3)
+
+        # Shared by all clients, e.g. of other monitors
+        other = ResilientDuneClient("key", breakers=self.breakers)
+        with self.assertRaises(CircuitOpenError):
+            other._get(URL)
+        self.assertEqual(mock_request.call_count, 3)
+        # Other endpoints are unaffected
+        mock_request.return_value = response(200, {"execution_id": "01ABC"})
+        other._post(URL.replace("status", "execute"), {})
+
+    def test_unexpected_error_releases_trial(self, mock_request, _):
+        breakers = CircuitBreakers(threshold=1, reset_timeout=0)
+        dune = ResilientDuneClient("key", RetryPolicy(attempts=1), breakers)
+        mock_request.side_effect = requests.Timeout("slow")
+        with self.assertLogs("src.resilience", level="WARNING"):
+            with self.assertRaises(requests.Timeout):
+                dune._get(URL)
+        # The half open trial fails unexpectedly
+        mock_request.side_effect = requests.exceptions.ChunkedEncodingError("cut")
+        with self.assertLogs("src.resilience", level="WARNING"):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                dune._get(URL)
+        # ... and a later trial is let through again
+        mock_request.side_effect = None
+        mock_request.return_value = response(200, {"ok": True})
+        self.assertEqual(dune._get(URL), {"ok": True})
+        self.assertEqual(breakers.snapshot()["status"]["state"], "closed")
+
+    def test_execute_retried_only_when_not_processed(self, mock_request, _):
+        execute = "https://api.dune.com/api/v1/query/1/execute"
+        ok = response(200, {"execution_id": "01ABC"})
+        refused = requests.ConnectionError(
+            MagicMock(reason=NewConnectionError(None, "refused"))
+        )
+        for failure in [refused, requests.ConnectTimeout("slow"), response(429)]:
+            mock_request.reset_mock()
+            mock_request.side_effect = [failure, ok]
+            with self.assertLogs("src.resilience", level="WARNING"):
+                self.assertEqual(self.dune._post(execute, {}), ok.json())
+            self.assertEqual(mock_request.call_count, 2)
+
+        # Dune may have started the (billed) execution
+        for failure, error in [
+            (requests.ReadTimeout("slow"), requests.ReadTimeout),
+            (response(500), requests.HTTPError),
+        ]:
+            mock_request.reset_mock()
+            mock_request.side_effect = [failure, ok]
+            with self.assertRaises(error):
+                self.dune._post(execute, {})
+            mock_request.assert_called_once()
+
+    def test_exhausted_retries_raise(self, mock_request, _):
+        dune = ResilientDuneClient("key", RetryPolicy(attempts=2), self.breakers)
+        mock_request.side_effect = requests.ConnectionError("refused")
+        with self.assertLogs("src.resilience", level="WARNING"):
+            with self.assertRaises(requests.ConnectionError):
+                dune._get(URL)
+        self.assertEqual(mock_request.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
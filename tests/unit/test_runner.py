@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from dune_client.query import Query
+
+from src.query_monitor.result_threshold import ResultThresholdQuery
+from src.runner import QueryRunner, RunOptions, summarize_results
+
+
+class TestQueryRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.results = [{"block": i, "hash": f"0x{i}"} for i in range(10)]
+        self.dune = MagicMock()
+        self.dune.refresh.return_value = self.results
+        self.alerter = MagicMock()
+        self.monitor = ResultThresholdQuery(Query(name="Monitor", query_id=0))
+
+    def test_summarize_results(self):
+        summary = summarize_results(self.results, max_rows=2)
+        self.assertEqual(summary["row_count"], 10)
+        self.assertEqual(summary["columns"], {"block": "int", "hash": "str"})
+        self.assertEqual(summary["rows"], self.results[:2])
+
+        self.assertEqual(
+            summarize_results([]), {"row_count": 0, "columns": {}, "rows": []}
+        )
+
+    def test_run_loop_logs_bounded_summary(self):
+        runner = QueryRunner(self.monitor, self.dune, self.alerter, 1)
+        with self.assertLogs("src.runner", level="WARNING") as logs:
+            runner.run_loop()
+        self.assertEqual(len(logs.records[0].data["rows"]), 5)
+        self.assertNotIn("0x9", logs.records[0].getMessage())
+        self.alerter.post.assert_called_once()
+
+    def test_result_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dump = os.path.join(tmp, "dump.jsonl")
+            runner = QueryRunner(
+                self.monitor,
+                self.dune,
+                self.alerter,
+                1,
+                options=RunOptions(result_dump=dump),
+            )
+            runner.run_loop()
+            with open(dump, encoding="utf-8") as dump_file:
+                self.assertEqual([json.loads(line) for line in dump_file], self.results)
+
+
+if __name__ == "__main__":
+    unittest.main()
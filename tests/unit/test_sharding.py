@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.daemon import MonitorDaemon
+from src.query_monitor.loader import ConfigLoader
+from src.sharding import HashRing, LeaseStore, ShardCoordinator
+from tests.file import filepath
+
+
+class TestHashRing(unittest.TestCase):
+    def test_consistent_assignment(self):
+        keys = [f"monitor-{i}.yaml" for i in range(200)]
+        ring = HashRing(["a", "b", "c"])
+        before = {key: ring.node_for(key) for key in keys}
+        self.assertEqual(set(before.values()), {"a", "b", "c"})
+
+        after = {key: HashRing(["a", "b"]).node_for(key) for key in keys}
+        # Only the keys of the removed node move.
+        for key in keys:
+            if before[key] != "c":
+                self.assertEqual(before[key], after[key])
+
+    def test_empty_ring(self):
+        with self.assertRaises(ValueError):
+            HashRing([]).node_for("key")
+
+
+class TestLeaseStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.store = LeaseStore(os.path.join(self.dir, "leases.db"), ttl=10)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_acquire_once_per_tick(self):
+        self.assertTrue(self.store.acquire("m", 1, "w1"))
+        self.assertFalse(self.store.acquire("m", 1, "w2"))
+        self.assertTrue(self.store.acquire("m", 2, "w2"))
+        self.store.complete("m", 1, "w1")
+        self.assertFalse(self.store.acquire("m", 1, "w1"))
+
+    def test_expired_lease_fails_over(self):
+        with patch("src.sharding.time.time", return_value=1000.0):
+            self.assertTrue(self.store.acquire("m", 1, "crashed"))
+        with patch("src.sharding.time.time", return_value=1005.0):
+            self.assertFalse(self.store.acquire("m", 1, "w2"))
+        with patch("src.sharding.time.time", return_value=1011.0):
+            self.assertTrue(self.store.acquire("m", 1, "w2"))
+
+    def test_live_workers(self):
+        with patch("src.sharding.time.time", return_value=1000.0):
+            self.store.heartbeat("old")
+        self.store.heartbeat("w1")
+        self.assertEqual(self.store.live_workers(), ["w1"])
+        self.store.remove_worker("w1")
+        self.assertEqual(self.store.live_workers(), [])
+
+
+class TestShardedDaemon(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.dir, "configs")
+        os.mkdir(self.config_dir)
+        for i in range(6):
+            shutil.copy(
+                filepath("no-params.yaml"), os.path.join(self.config_dir, f"{i}.yaml")
+            )
+        self.store = LeaseStore(os.path.join(self.dir, "leases.db"))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    @patch("src.post.factory.get_post_client")
+    def test_each_monitor_runs_once(self, _):
+        dune = MagicMock()
+        dune.refresh.return_value = []
+        daemons = []
+        for worker in ["w1", "w2"]:
+            self.store.heartbeat(worker)
+            daemons.append(
+                MonitorDaemon(
+                    ConfigLoader(self.config_dir),
+                    dune,
+                    interval=60,
+                    shard=ShardCoordinator(self.store, worker),
+                )
+            )
+        for _ in range(2):
+            for daemon in daemons:
+                daemon.tick(tick=1)
+        self.assertEqual(dune.refresh.call_count, 6)
+
+        # w2 crashes: w1 takes over its whole shard on the next tick.
+        self.store.remove_worker("w2")
+        daemons[0].tick(tick=2)
+        self.assertEqual(dune.refresh.call_count, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from src.registry import LazyRegistry
+
+ROOT = Path(__file__).parent.parent.parent
+
+# Cold start (imports and loading one config) takes ~0.9s, mostly dune_client's
+# web3 dependency. Generous for slow CI, but catches eagerly imported heavy
+# modules (e.g. pyarrow, tweepy, slack_sdk add seconds).
+STARTUP_BUDGET_SECONDS = 3.0
+
+# Executed in a fresh interpreter so that modules imported by other tests
+# do not leak into the measurement.
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import src.slackbot
+from src.query_monitor.factory import load_config
+load_config("tests/data/counter.yaml")
+print(time.perf_counter() - start)
+print(",".join(sorted(sys.modules)))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_post_clients_loaded_lazily(self):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()
+        seconds = float(out[0])
+        print(f"cold start took {seconds:.3f}s")
+        self.assertLess(seconds, STARTUP_BUDGET_SECONDS)
+        modules = set(out[1].split(","))
+        for heavy in [
+            "tweepy",
+            "slack",
+            "pyarrow",
+            "src.slack_client",
+            "src.post.twitter",
+        ]:
+            self.assertNotIn(heavy, modules)
+        # Only the requested monitor type is imported.
+        self.assertIn("src.query_monitor.counter", modules)
+        self.assertNotIn("src.query_monitor.windowed", modules)
+
+    def test_logging_not_configured_on_import(self):
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import logging, src.runner, src.query_monitor.factory;"
+                "print(len(logging.getLogger('src').handlers))",
+            ],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        self.assertEqual(out.strip(), "0")
+
+
+class TestLazyRegistry(unittest.TestCase):
+    def test_get(self):
+        registry = LazyRegistry({"path": "os.path.join", "missing": "os.nothing"})
+        self.assertIn("path", registry)
+        self.assertEqual(registry.get("path")("a", "b"), "a/b")
+        with self.assertRaises(AttributeError):
+            registry.get("missing")
+        with self.assertRaises(ValueError):
+            registry.get("unregistered")
+
+
+if __name__ == "__main__":
+    unittest.main()
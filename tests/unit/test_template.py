@@ -0,0 +1,90 @@
+import unittest
+
+from src.query_monitor.factory import load_config, parse_config, validate_config
+from src.template import Excerpt, MessageTemplate, truncate
+from tests.file import filepath
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.results = [
+            {"tx": f"0x{i}", "amount": str(i % 7), "note": "x"} for i in range(1000)
+        ]
+
+    def test_truncate(self):
+        self.assertEqual(truncate("short", 10), "short")
+        self.assertEqual(truncate("a" * 20, 10), "a" * 9 + "…")
+
+    def test_excerpt(self):
+        excerpt = Excerpt(rows=2, order_by="amount", columns=["tx", "amount"])
+        rows = excerpt.select(self.results)
+        self.assertEqual([row["tx"] for row in rows], ["0x6", "0x13"])
+        self.assertEqual(
+            excerpt.format(rows, len(self.results)),
+            "tx=0x6, amount=6\ntx=0x13, amount=6\n(+998 more)",
+        )
+        # Without ordering, the first rows are taken (from any iterable)
+        self.assertEqual(Excerpt(rows=1).select(iter(self.results)), self.results[:1])
+
+    def test_compile_errors(self):
+        with self.assertRaises(ValueError):
+            MessageTemplate("{unknown}", {"name": ""}, 100)
+        with self.assertRaises(ValueError):
+            MessageTemplate("{name", {"name": ""}, 100)
+        with self.assertRaises(ValueError):
+            parse_config({"name": "x", "id": 1, "message": "{value}"})
+
+    def test_format_spec_errors(self):
+        for template in ["{num_results:%Y}", "{name:d}", "{value:d}", "{name!x}"]:
+            with self.assertRaises(ValueError, msg=template):
+                parse_config({"name": "x", "id": 1, "column": "c", "message": template})
+        # Specs valid for the field's type are accepted
+        config = parse_config(
+            {"name": "x", "id": 1, "message": "{num_results:,d} {name!r:>10}"}
+        )
+        self.assertEqual(
+            config.query.get_alert([{}] * 1000).message[:6],
+            "1,000 ",
+        )
+
+    def test_excerpt_errors(self):
+        for excerpt in [
+            {"order_by": ["a"]},
+            {"columns": "a"},
+            {"columns": ["a", 1]},
+            {"rows": "5"},
+            {"size": 5},
+        ]:
+            with self.assertRaises(ValueError, msg=str(excerpt)):
+                validate_config({"name": "x", "id": 1, "excerpt": excerpt})
+        validate_config(
+            {"name": "x", "id": 1, "excerpt": {"order_by": None, "columns": ["a"]}}
+        )
+
+    def test_render_within_limit(self):
+        template = MessageTemplate(
+            "{name!r}: {num:>4}\n{excerpt}",
+            {"name": "", "num": 0},
+            60,
+            Excerpt(rows=10),
+        )
+        message = template.render({"name": "Q", "num": 7}, self.results)
+        self.assertLessEqual(len(message), 60)
+        self.assertTrue(message.startswith("'Q':    7\ntx=0x0, amount=0, note=x\n"))
+        self.assertTrue(message.endswith("more)"))
+
+        # Without excerpt the message is cut as last resort
+        template = MessageTemplate("{name}", {"name": ""}, 5)
+        self.assertEqual(template.render({"name": "long name"}, []), "long…")
+
+    def test_configured_message(self):
+        monitor = load_config(filepath("message-template.yaml")).query
+        alert = monitor.get_alert(self.results)
+        self.assertLessEqual(len(alert.message), 280)
+        self.assertTrue(alert.message.startswith("1000 trades above threshold"))
+        self.assertIn("tx=0x6, amount=6", alert.message)
+        self.assertNotIn("note", alert.message)
+
+
+if __name__ == "__main__":
+    unittest.main()